@@ -0,0 +1,222 @@
+from logic import *
+
+
+class BDD():
+    """
+    Reduced ordered binary decision diagrams over logical symbols.
+
+    Nodes are integers shared by every diagram built with the same BDD:
+    0 and 1 are the FALSE and TRUE terminals, and any other node `u` has
+    a test on the symbol at `self.nodes[u][0]` with a `low` child for when
+    that symbol is false and a `high` child for when it is true.
+    """
+
+    FALSE = 0
+    TRUE = 1
+
+    def __init__(self, order=None):
+        """
+        Create an empty BDD. `order` optionally gives the symbol names in
+        the order they should be tested; any other symbols are ordered
+        as they are first seen.
+        """
+
+        # Symbol names by level, and the level of each symbol name
+        self.order = []
+        self.levels = dict()
+
+        # (level, low, high) for every node; terminals sit below all levels
+        self.nodes = [(float("inf"), None, None), (float("inf"), None, None)]
+
+        # Unique table, so equal subdiagrams are always the same node
+        self.unique = dict()
+
+        # Results of earlier operations, keyed on the operation and nodes
+        self.cache = dict()
+
+        for name in order or []:
+            self.add_symbol(name)
+
+    def add_symbol(self, name):
+        """Adds a symbol below every existing level, if not yet ordered."""
+        if name not in self.levels:
+            self.levels[name] = len(self.order)
+            self.order.append(name)
+        return self.levels[name]
+
+    def node(self, level, low, high):
+        """Returns the node testing `level`, reusing or reducing it."""
+        if low == high:
+            return low
+        key = (level, low, high)
+        if key not in self.unique:
+            self.unique[key] = len(self.nodes)
+            self.nodes.append(key)
+        return self.unique[key]
+
+    def variable(self, name):
+        """Returns the node that is true exactly when `name` is true."""
+        return self.node(self.add_symbol(name), BDD.FALSE, BDD.TRUE)
+
+    def negate(self, u):
+        """Returns the node for the negation of `u`."""
+        return self.apply("xor", u, BDD.TRUE)
+
+    def apply(self, op, u, v):
+        """
+        Combines nodes `u` and `v` with `op`, which is one of
+        "and", "or" or "xor".
+        """
+
+        # Terminal cases
+        if op == "and":
+            if u == BDD.FALSE or v == BDD.FALSE:
+                return BDD.FALSE
+            if u == BDD.TRUE or u == v:
+                return v
+            if v == BDD.TRUE:
+                return u
+        elif op == "or":
+            if u == BDD.TRUE or v == BDD.TRUE:
+                return BDD.TRUE
+            if u == BDD.FALSE or u == v:
+                return v
+            if v == BDD.FALSE:
+                return u
+        elif op == "xor":
+            if u == v:
+                return BDD.FALSE
+            if u == BDD.FALSE:
+                return v
+            if v == BDD.FALSE:
+                return u
+        else:
+            raise Exception(f"unknown operation {op}")
+
+        # Every operation is commutative, so order operands for the cache
+        if u > v:
+            u, v = v, u
+        key = (op, u, v)
+        if key in self.cache:
+            return self.cache[key]
+
+        # Split on whichever operand tests the earliest symbol
+        level_u, low_u, high_u = self.nodes[u]
+        level_v, low_v, high_v = self.nodes[v]
+        level = min(level_u, level_v)
+        if level_u != level:
+            low_u = high_u = u
+        if level_v != level:
+            low_v = high_v = v
+
+        result = self.node(
+            level,
+            self.apply(op, low_u, low_v),
+            self.apply(op, high_u, high_v)
+        )
+        self.cache[key] = result
+        return result
+
+    def compile(self, sentence):
+        """Returns the node equivalent to a logical sentence."""
+        if isinstance(sentence, Symbol):
+            return self.variable(sentence.name)
+        elif isinstance(sentence, Not):
+            return self.negate(self.compile(sentence.operand))
+        elif isinstance(sentence, And):
+            result = BDD.TRUE
+            for conjunct in sentence.conjuncts:
+                result = self.apply("and", result, self.compile(conjunct))
+            return result
+        elif isinstance(sentence, Or):
+            result = BDD.FALSE
+            for disjunct in sentence.disjuncts:
+                result = self.apply("or", result, self.compile(disjunct))
+            return result
+        elif isinstance(sentence, Implication):
+            return self.apply(
+                "or",
+                self.negate(self.compile(sentence.antecedent)),
+                self.compile(sentence.consequent)
+            )
+        elif isinstance(sentence, Biconditional):
+            return self.negate(self.apply(
+                "xor",
+                self.compile(sentence.left),
+                self.compile(sentence.right)
+            ))
+        raise TypeError("must be a logical sentence")
+
+    def entails(self, knowledge, query):
+        """
+        Checks if `knowledge` entails `query`, where each is either a
+        compiled node or a logical sentence.
+        """
+        if isinstance(knowledge, Sentence):
+            knowledge = self.compile(knowledge)
+        if isinstance(query, Sentence):
+            query = self.compile(query)
+        return self.apply("and", knowledge, self.negate(query)) == BDD.FALSE
+
+    def ordered(self, symbols):
+        """
+        Returns the levels of the given symbol names in order, defaulting
+        to every symbol this BDD has seen.
+        """
+        if symbols is None:
+            return list(range(len(self.order)))
+        return sorted(self.add_symbol(name) for name in symbols)
+
+    def count(self, u, symbols=None):
+        """
+        Returns the number of assignments to `symbols` (by default, every
+        symbol seen) that satisfy node `u`. `symbols` must include every
+        symbol that `u` depends on.
+        """
+        levels = self.ordered(symbols)
+        position = {level: i for i, level in enumerate(levels)}
+        position[float("inf")] = len(levels)
+        counts = dict()
+
+        def satisfying(u):
+            """Counts assignments to the symbols from u's level down."""
+            if u <= BDD.TRUE:
+                return u
+            if u not in counts:
+                level, low, high = self.nodes[u]
+                i = position[level]
+                counts[u] = (
+                    satisfying(low) * 2 ** (position[self.nodes[low][0]] - i - 1)
+                    + satisfying(high) * 2 ** (position[self.nodes[high][0]] - i - 1)
+                )
+            return counts[u]
+
+        return satisfying(u) * 2 ** position[self.nodes[u][0]]
+
+    def models(self, u, symbols=None):
+        """
+        Lazily yields every assignment to `symbols` (by default, every
+        symbol seen) that satisfies node `u`, as a dict from symbol names
+        to truth values.
+        """
+        levels = self.ordered(symbols)
+        model = dict()
+
+        def walk(u, i):
+            if u == BDD.FALSE:
+                return
+            if i == len(levels):
+                yield dict(model)
+                return
+            name = self.order[levels[i]]
+            level, low, high = self.nodes[u]
+
+            # Symbols the node does not test can take either value
+            if level != levels[i]:
+                low = high = u
+            for value, child in ((False, low), (True, high)):
+                model[name] = value
+                yield from walk(child, i + 1)
+            del model[name]
+
+        yield from walk(u, 0)
@@ -0,0 +1,240 @@
+import argparse
+import json
+import random
+import resource
+import sys
+import time
+import tracemalloc
+
+from concurrent.futures import ProcessPoolExecutor
+
+from bdd import BDD
+from logic import *
+
+
+# Problem sizes generated for each puzzle family
+SIZES = {
+    "knights": [2, 3, 4, 5],
+    "3sat": [8, 12, 16],
+    "pigeonhole": [2, 3]
+}
+
+# Clause-to-variable ratio where random 3-SAT is hardest
+PHASE_TRANSITION = 4.26
+
+
+def knights_and_knaves(n, rng):
+    """
+    Generates a knights-and-knaves puzzle with `n` inhabitants, each of
+    whom makes one random statement about another inhabitant.
+    Returns the puzzle's knowledge and the queries to ask of it.
+    """
+    knights = [Symbol(f"{i} is a Knight") for i in range(n)]
+    knaves = [Symbol(f"{i} is a Knave") for i in range(n)]
+    knowledge = And()
+
+    for i in range(n):
+
+        # Rule: either one, but not both nor neither
+        knowledge.add(And(Or(knights[i], knaves[i]),
+                          Not(And(knights[i], knaves[i]))))
+
+        # Consider what i said and when that is true
+        j = rng.choice([other for other in range(n) if other != i] or [i])
+        statement = rng.choice([
+            knights[j],
+            knaves[j],
+            Or(And(knights[i], knights[j]), And(knaves[i], knaves[j])),
+            Or(knaves[i], knaves[j])
+        ])
+        knowledge.add(Biconditional(knights[i], statement))
+
+    return knowledge, knights + knaves
+
+
+def random_3sat(n, rng, ratio=PHASE_TRANSITION):
+    """
+    Generates a random 3-SAT instance over `n` symbols with `ratio * n`
+    clauses, each over three distinct symbols with random signs.
+    Returns the instance and a single random symbol to query.
+    """
+    symbols = [Symbol(f"x{i}") for i in range(n)]
+    knowledge = And()
+    for _ in range(round(ratio * n)):
+        literals = [
+            symbol if rng.random() < 0.5 else Not(symbol)
+            for symbol in rng.sample(symbols, 3)
+        ]
+        knowledge.add(Or(*literals))
+    return knowledge, [rng.choice(symbols)]
+
+
+def pigeonhole(holes, rng):
+    """
+    Generates the unsatisfiable formula stating that `holes + 1` pigeons
+    each sit in one of `holes` holes with no two pigeons sharing a hole.
+    Returns the formula and a single random symbol to query.
+    """
+    pigeons = holes + 1
+    sits = [[Symbol(f"p{i}h{j}") for j in range(holes)]
+            for i in range(pigeons)]
+    knowledge = And()
+
+    # Every pigeon sits in some hole
+    for i in range(pigeons):
+        knowledge.add(Or(*sits[i]))
+
+    # No two pigeons share a hole
+    for j in range(holes):
+        for i in range(pigeons):
+            for k in range(i + 1, pigeons):
+                knowledge.add(Or(Not(sits[i][j]), Not(sits[k][j])))
+
+    return knowledge, [rng.choice(rng.choice(sits))]
+
+
+FAMILIES = {
+    "knights": knights_and_knaves,
+    "3sat": random_3sat,
+    "pigeonhole": pigeonhole
+}
+
+
+def check_serial(knowledge, queries):
+    return [model_check(knowledge, query) for query in queries]
+
+
+def check_parallel(knowledge, queries):
+    return [parallel_model_check(knowledge, query) for query in queries]
+
+
+def check_knowledge_base(knowledge, queries):
+    kb = KnowledgeBase(knowledge)
+    return [kb.entails(query) for query in queries]
+
+
+def check_resolution(knowledge, queries):
+    return [resolution_check(knowledge, query) for query in queries]
+
+
+def check_bdd(knowledge, queries):
+    bdd = BDD()
+    compiled = bdd.compile(knowledge)
+    return [bdd.entails(compiled, query) for query in queries]
+
+
+# Every available entailment backend, answering all of a problem's queries
+BACKENDS = {
+    "model_check": check_serial,
+    "parallel_model_check": check_parallel,
+    "knowledge_base": check_knowledge_base,
+    "bdd": check_bdd,
+    "resolution": check_resolution
+}
+
+# Backends doing their work in worker processes, which tracemalloc cannot
+# see into
+MULTIPROCESS = {"parallel_model_check"}
+
+
+def measure(name, knowledge, queries):
+    """
+    Runs a backend on a problem twice: once for wall-clock time, and once
+    to measure peak memory, since measuring slows Python down.
+
+    Peak memory is the peak bytes allocated under tracemalloc, except for
+    backends in MULTIPROCESS, where it is the peak resident set size of
+    their largest worker process.
+    Returns the answers, the elapsed seconds and the peak bytes.
+    """
+    backend = BACKENDS[name]
+    start = time.perf_counter()
+    answers = backend(knowledge, queries)
+    seconds = time.perf_counter() - start
+
+    if name in MULTIPROCESS:
+        # Run in a fresh process, so only this run's workers are counted
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            peak = executor.submit(
+                worker_peak, name, knowledge, queries
+            ).result()
+    else:
+        tracemalloc.start()
+        backend(knowledge, queries)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return answers, seconds, peak
+
+
+def worker_peak(name, knowledge, queries):
+    """
+    Runs a backend and returns the peak resident set size in bytes of the
+    largest process it started and waited for.
+    """
+    BACKENDS[name](knowledge, queries)
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+
+    # Linux reports kibibytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the entailment backends in logic.py."
+    )
+    parser.add_argument("--families", nargs="+", choices=FAMILIES,
+                        default=list(FAMILIES))
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS,
+                        default=list(BACKENDS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="file to write JSON lines to")
+    args = parser.parse_args()
+
+    output = open(args.output, "w") if args.output else None
+    print(f"{'family':<12}{'size':>6}{'backend':>24}"
+          f"{'seconds':>12}{'peak KiB':>12}")
+
+    for family in args.families:
+        for size in SIZES[family]:
+
+            # Every backend sees the same generated problem
+            rng = random.Random(f"{args.seed}-{family}-{size}")
+            knowledge, queries = FAMILIES[family](size, rng)
+
+            expected = None
+            for name in args.backends:
+                answers, seconds, peak = measure(name, knowledge, queries)
+
+                # Backends must agree with each other
+                if expected is None:
+                    expected = answers
+                elif answers != expected:
+                    sys.exit(f"{name} disagrees on {family} size {size}")
+
+                print(f"{family:<12}{size:>6}{name:>24}"
+                      f"{seconds:>12.4f}{peak / 1024:>12.1f}"
+                      f"{' worker RSS' if name in MULTIPROCESS else ''}")
+                if output:
+                    output.write(json.dumps({
+                        "family": family,
+                        "size": size,
+                        "seed": args.seed,
+                        "backend": name,
+                        "symbols": len(knowledge.symbols()),
+                        "queries": len(queries),
+                        "entailed": answers.count(True),
+                        "seconds": seconds,
+                        "peak_bytes": peak,
+                        "peak_measure": (
+                            "worker_rss" if name in MULTIPROCESS
+                            else "tracemalloc"
+                        )
+                    }) + "\n")
+
+    if output:
+        output.close()
+
+
+if __name__ == "__main__":
+    main()
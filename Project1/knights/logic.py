@@ -1,4 +1,10 @@
+import heapq
 import itertools
+import json
+import multiprocessing
+import re
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 
 class Sentence():
@@ -217,8 +223,8 @@ class Biconditional(Sentence):
                     and not self.right.evaluate(model)))
 
     def formula(self):
-        left = Sentence.parenthesize(str(self.left))
-        right = Sentence.parenthesize(str(self.right))
+        left = Sentence.parenthesize(self.left.formula())
+        right = Sentence.parenthesize(self.right.formula())
         return f"{left} <=> {right}"
 
     def symbols(self):
@@ -261,3 +267,460 @@ def model_check(knowledge, query):
 
     # Check that knowledge entails query
     return check_all(knowledge, query, symbols, dict())
+
+
+def parallel_model_check(knowledge, query, k=3, processes=None):
+    """
+    Checks if knowledge base entails query, using a pool of processes.
+
+    The first `k` symbols are fixed to each of their 2^k assignments, giving
+    independent subproblems that are checked in parallel. As soon as any
+    worker finds a model where knowledge holds but query does not, the
+    remaining subproblems are cancelled.
+    """
+
+    # Fix the first k symbols (in a stable order) to split the search
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+    k = min(k, len(symbols))
+    fixed = symbols[:k]
+    remaining = symbols[k:]
+
+    # Workers receive the knowledge base once, when the pool starts
+    stop = multiprocessing.Event()
+    with ProcessPoolExecutor(
+        max_workers=processes,
+        initializer=_init_worker,
+        initargs=(knowledge, query, stop)
+    ) as executor:
+        futures = [
+            executor.submit(_check_partial, remaining, dict(zip(fixed, values)))
+            for values in itertools.product([True, False], repeat=k)
+        ]
+        for future in as_completed(futures):
+
+            # A counterexample was found, so stop every other worker
+            if not future.result():
+                stop.set()
+                for other in futures:
+                    other.cancel()
+                return False
+    return True
+
+
+# Knowledge base, query and stop flag shared by every parallel worker
+_worker_state = None
+
+# Workers only look at the stop flag, which takes a lock, before subtrees
+# with at least this many symbols left, so at most 2^STOP_CHECK_SYMBOLS
+# models are checked after another worker finds a counterexample
+STOP_CHECK_SYMBOLS = 10
+
+
+def _init_worker(knowledge, query, stop):
+    """Stores the knowledge base a worker process will check against."""
+    global _worker_state
+    _worker_state = (knowledge, query, stop)
+
+
+def _check_partial(symbols, model):
+    """
+    Checks that the worker's knowledge base entails its query in every
+    extension of the partial `model` over `symbols`.
+    """
+    knowledge, query, stop = _worker_state
+
+    def check_all(symbols, model):
+
+        # Another worker already found a counterexample
+        if len(symbols) >= STOP_CHECK_SYMBOLS and stop.is_set():
+            return True
+
+        if not symbols:
+            if knowledge.evaluate(model):
+                return query.evaluate(model)
+            return True
+
+        p = symbols[0]
+        model_true = model.copy()
+        model_true[p] = True
+        model_false = model.copy()
+        model_false[p] = False
+        return (check_all(symbols[1:], model_true) and
+                check_all(symbols[1:], model_false))
+
+    return check_all(symbols, model)
+
+
+class KnowledgeBase():
+    """
+    Knowledge base that finds the models satisfying its knowledge once,
+    then answers any number of entailment queries against those models.
+    """
+
+    def __init__(self, *sentences):
+        self.knowledge = And()
+
+        # Symbol names in the order they were introduced
+        self.symbols = []
+
+        # Every assignment to self.symbols in which the knowledge holds
+        self.models = [dict()]
+
+        for sentence in sentences:
+            self.add(sentence)
+
+    def add(self, sentence):
+        """
+        Adds a sentence to the knowledge base, filtering the cached models
+        instead of enumerating them again from scratch.
+        """
+        Sentence.validate(sentence)
+        self.knowledge.add(sentence)
+
+        # Models only need to be extended over symbols we have not seen yet
+        new_symbols = sorted(sentence.symbols() - set(self.symbols))
+        self.symbols.extend(new_symbols)
+        self.models = [
+            model for model in KnowledgeBase.extend(self.models, new_symbols)
+            if sentence.evaluate(model)
+        ]
+
+    def entails(self, query):
+        """Checks if knowledge base entails query."""
+        Sentence.validate(query)
+        unknown = sorted(query.symbols() - set(self.symbols))
+        return all(
+            query.evaluate(model)
+            for model in KnowledgeBase.extend(self.models, unknown)
+        )
+
+    def satisfiable(self):
+        """Checks if any model satisfies the knowledge base."""
+        return len(self.models) > 0
+
+    @classmethod
+    def extend(cls, models, symbols):
+        """
+        Yields every extension of each model in `models` that also assigns
+        a truth value to each symbol in `symbols`.
+        """
+        for model in models:
+            if not symbols:
+                yield model
+                continue
+            for values in itertools.product([True, False], repeat=len(symbols)):
+                extended = model.copy()
+                extended.update(zip(symbols, values))
+                yield extended
+
+
+def to_cnf(sentence, positive=True):
+    """
+    Returns the clauses of the conjunctive normal form of `sentence`
+    (or of its negation, if `positive` is False) as a set of frozensets
+    of literals, where a literal is a pair of a symbol name and whether
+    that symbol is true. Tautological clauses are left out.
+    """
+
+    def distribute(*clause_sets):
+        """Returns the clauses of the disjunction of several CNFs."""
+        result = {frozenset()}
+        for clauses in clause_sets:
+            result = {
+                first | second
+                for first in result for second in clauses
+                if not tautology(first | second)
+            }
+        return result
+
+    if isinstance(sentence, Symbol):
+        return {frozenset([(sentence.name, positive)])}
+    elif isinstance(sentence, Not):
+        return to_cnf(sentence.operand, not positive)
+    elif isinstance(sentence, And):
+        parts = [to_cnf(conjunct, positive) for conjunct in sentence.conjuncts]
+        return set().union(*parts) if positive else distribute(*parts)
+    elif isinstance(sentence, Or):
+        parts = [to_cnf(disjunct, positive) for disjunct in sentence.disjuncts]
+        return distribute(*parts) if positive else set().union(*parts)
+    elif isinstance(sentence, Implication):
+        if positive:
+            return distribute(to_cnf(sentence.antecedent, False),
+                              to_cnf(sentence.consequent, True))
+        return set.union(to_cnf(sentence.antecedent, True),
+                         to_cnf(sentence.consequent, False))
+    elif isinstance(sentence, Biconditional):
+        left, right = sentence.left, sentence.right
+        return set.union(
+            distribute(to_cnf(left, not positive), to_cnf(right, True)),
+            distribute(to_cnf(left, positive), to_cnf(right, False))
+        )
+    raise TypeError("must be a logical sentence")
+
+
+def tautology(clause):
+    """Checks if a clause contains a literal and its complement."""
+    return any((name, not value) in clause for name, value in clause)
+
+
+def refute(usable, support):
+    """
+    Searches for a resolution refutation of the clauses in `usable` and
+    `support`, using the set-of-support strategy: every resolution step
+    involves at least one clause derived from `support`.
+
+    Returns True if the empty clause is derived, and False if the
+    search saturates without deriving it.
+    """
+
+    # Every kept clause, indexed by each of its literals
+    occurs = dict()
+
+    # Clauses that may be resolved against the next given clause
+    active = set()
+
+    # Support clauses not yet given, smallest first
+    pending = set()
+    queue = []
+    counter = itertools.count()
+
+    def subsumed(clause):
+        """Checks if some kept clause is a subset of `clause`."""
+        return any(
+            other <= clause
+            for literal in clause for other in occurs.get(literal, ())
+        )
+
+    def keep(clause, given=False):
+        """Adds a clause, first removing every clause it subsumes."""
+        if clause:
+            literal = min(clause, key=lambda l: len(occurs.get(l, ())))
+            for other in list(occurs.get(literal, ())):
+                if clause <= other:
+                    discard(other)
+        for literal in clause:
+            occurs.setdefault(literal, set()).add(clause)
+        if given:
+            pending.add(clause)
+            heapq.heappush(queue, (len(clause), next(counter), clause))
+        else:
+            active.add(clause)
+
+    def discard(clause):
+        for literal in clause:
+            occurs[literal].discard(clause)
+        active.discard(clause)
+        pending.discard(clause)
+
+    for clauses, given in ((usable, False), (support, True)):
+        for clause in clauses:
+            if not clause:
+                return True
+            if not tautology(clause) and not subsumed(clause):
+                keep(clause, given)
+
+    while queue:
+        _, _, clause = heapq.heappop(queue)
+
+        # Skip clauses removed by backward subsumption while waiting
+        if clause not in pending:
+            continue
+        pending.remove(clause)
+        active.add(clause)
+
+        # Resolve against every active clause with a complementary literal
+        for name, value in clause:
+            complement = (name, not value)
+            for other in list(occurs.get(complement, ())):
+                if other not in active:
+                    continue
+                resolvent = ((clause - {(name, value)})
+                             | (other - {complement}))
+                if not resolvent:
+                    return True
+                if tautology(resolvent) or subsumed(resolvent):
+                    continue
+                keep(resolvent, given=True)
+
+            # The given clause itself may have been subsumed
+            if clause not in active:
+                break
+
+    return False
+
+
+def resolution_check(knowledge, query):
+    """
+    Checks if knowledge base entails query by resolution refutation:
+    knowledge entails query exactly when knowledge and not query
+    together are unsatisfiable.
+    """
+    knowledge_clauses = to_cnf(knowledge)
+    if refute(knowledge_clauses, to_cnf(query, False)):
+        return True
+
+    # Set of support only finds refutations that use the negated query,
+    # so an inconsistent knowledge base (which entails anything) needs
+    # a refutation of its own
+    return refute(set(), knowledge_clauses)
+
+
+# Tokens of the syntax emitted by Sentence.formula(); anything between
+# operators and parentheses is a symbol name
+TOKENS = re.compile(r"\s*(<=>|=>|[()¬∧∨]|(?:[^()¬∧∨<=]|=(?!>)|<(?!=>))+)")
+
+
+def parse(formula):
+    """
+    Parses a string in the syntax produced by Sentence.formula() back into
+    a logical sentence.
+    """
+    tokens = []
+    position = 0
+    formula = formula.rstrip()
+    while position < len(formula):
+        match = TOKENS.match(formula, position)
+        if match is None:
+            raise Exception(f"unexpected character at {position}")
+        tokens.append(match.group(1).strip())
+        position = match.end()
+    if not tokens:
+        raise Exception("empty formula")
+
+    # Symbols are shared by every occurrence of the same name
+    symbols = dict()
+    index = 0
+
+    def peek():
+        return tokens[index] if index < len(tokens) else None
+
+    def expect(token):
+        nonlocal index
+        if peek() != token:
+            raise Exception(f"expected {token!r}, found {peek()!r}")
+        index += 1
+
+    def biconditional():
+        nonlocal index
+        sentence = implication()
+        while peek() == "<=>":
+            index += 1
+            sentence = Biconditional(sentence, implication())
+        return sentence
+
+    def implication():
+        nonlocal index
+        sentence = disjunction()
+        if peek() == "=>":
+            index += 1
+            sentence = Implication(sentence, implication())
+        return sentence
+
+    def disjunction():
+        nonlocal index
+        disjuncts = [conjunction()]
+        while peek() == "∨":
+            index += 1
+            disjuncts.append(conjunction())
+        return disjuncts[0] if len(disjuncts) == 1 else Or(*disjuncts)
+
+    def conjunction():
+        nonlocal index
+        conjuncts = [unary()]
+        while peek() == "∧":
+            index += 1
+            conjuncts.append(unary())
+        return conjuncts[0] if len(conjuncts) == 1 else And(*conjuncts)
+
+    def unary():
+        nonlocal index
+        token = peek()
+        if token == "¬":
+            index += 1
+            return Not(unary())
+        if token == "(":
+            index += 1
+            sentence = biconditional()
+            expect(")")
+            return sentence
+        if token is None or token in ("<=>", "=>", "∨", "∧", ")"):
+            raise Exception(f"expected a symbol, found {token!r}")
+        index += 1
+        if token not in symbols:
+            symbols[token] = Symbol(token)
+        return symbols[token]
+
+    sentence = biconditional()
+    if index != len(tokens):
+        raise Exception(f"unexpected {peek()!r} after end of formula")
+    return sentence
+
+
+def encode(sentence):
+    """
+    Returns a compact JSON-compatible representation of a sentence:
+    symbols become their names, and connectives become a list of their
+    tag followed by their encoded operands.
+    """
+    if isinstance(sentence, Symbol):
+        return sentence.name
+    elif isinstance(sentence, Not):
+        return ["not", encode(sentence.operand)]
+    elif isinstance(sentence, And):
+        return ["and"] + [encode(conjunct) for conjunct in sentence.conjuncts]
+    elif isinstance(sentence, Or):
+        return ["or"] + [encode(disjunct) for disjunct in sentence.disjuncts]
+    elif isinstance(sentence, Implication):
+        return ["implies", encode(sentence.antecedent),
+                encode(sentence.consequent)]
+    elif isinstance(sentence, Biconditional):
+        return ["biconditional", encode(sentence.left), encode(sentence.right)]
+    raise TypeError("must be a logical sentence")
+
+
+def decode(data, symbols=None):
+    """
+    Rebuilds a sentence from the output of encode().
+    `symbols` optionally maps names to Symbol objects to reuse.
+    """
+    if symbols is None:
+        symbols = dict()
+
+    def build(data):
+        if isinstance(data, str):
+            if data not in symbols:
+                symbols[data] = Symbol(data)
+            return symbols[data]
+        tag, operands = data[0], [build(operand) for operand in data[1:]]
+        if tag == "not":
+            return Not(*operands)
+        elif tag == "and":
+            return And(*operands)
+        elif tag == "or":
+            return Or(*operands)
+        elif tag == "implies":
+            return Implication(*operands)
+        elif tag == "biconditional":
+            return Biconditional(*operands)
+        raise Exception(f"unknown connective {tag!r}")
+
+    return build(data)
+
+
+def dump(sentences, f):
+    """Writes sentences to an open text file, one JSON line each."""
+    for sentence in sentences:
+        f.write(json.dumps(encode(sentence), ensure_ascii=False,
+                           separators=(",", ":")))
+        f.write("\n")
+
+
+def load(f):
+    """
+    Lazily reads sentences written by dump() from an open text file,
+    so large knowledge bases can be streamed from disk.
+    """
+    symbols = dict()
+    for line in f:
+        if line.strip():
+            yield decode(json.loads(line), symbols)
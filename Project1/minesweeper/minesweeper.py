@@ -1,5 +1,9 @@
 import itertools
+import math
 import random
+import time
+
+from collections import deque
 
 
 class Minesweeper():
@@ -7,13 +11,16 @@ class Minesweeper():
     Minesweeper game representation
     """
 
-    def __init__(self, height=8, width=8, mines=8):
+    def __init__(self, height=8, width=8, mines=8, seed=None):
 
         # Set initial width, height, and number of mines
         self.height = height
         self.width = width
         self.mines = set()
 
+        # Games with the same seed have the same mines
+        rng = random.Random(seed) if seed is not None else random
+
         # Initialize an empty field with no mines
         self.board = []
         for i in range(self.height):
@@ -24,8 +31,8 @@ class Minesweeper():
 
         # Add mines randomly
         while len(self.mines) != mines:
-            i = random.randrange(height)
-            j = random.randrange(width)
+            i = rng.randrange(height)
+            j = rng.randrange(width)
             if not self.board[i][j]:
                 self.mines.add((i, j))
                 self.board[i][j] = True
@@ -33,6 +40,17 @@ class Minesweeper():
         # At first, player has found no mines
         self.mines_found = set()
 
+    @classmethod
+    def from_layout(cls, height, width, mines):
+        """
+        Creates a game with mines at exactly the given cells.
+        """
+        game = cls(height=height, width=width, mines=0)
+        for i, j in mines:
+            game.mines.add((i, j))
+            game.board[i][j] = True
+        return game
+
     def print(self):
         """
         Prints a text-based representation
@@ -77,6 +95,35 @@ class Minesweeper():
 
         return count
 
+    def reveal(self, cell, revealed=None):
+        """
+        Reveals a safe cell, and if no mines are nearby, every cell
+        reachable from it through cells with no nearby mines, skipping
+        cells in `revealed`.
+        Returns the (cell, nearby mine count) pair for each revealed cell.
+        """
+        if revealed is None:
+            revealed = set()
+        observations = []
+        seen = {cell}
+        queue = deque([cell])
+        while queue:
+            cell = queue.popleft()
+            count = self.nearby_mines(cell)
+            observations.append((cell, count))
+            if count != 0:
+                continue
+
+            # Every neighbor of a cell with no nearby mines is safe
+            for i in range(cell[0] - 1, cell[0] + 2):
+                for j in range(cell[1] - 1, cell[1] + 2):
+                    if (0 <= i < self.height and 0 <= j < self.width
+                            and (i, j) not in seen
+                            and (i, j) not in revealed):
+                        seen.add((i, j))
+                        queue.append((i, j))
+        return observations
+
     def won(self):
         """
         Checks if all mines have been flagged.
@@ -84,22 +131,108 @@ class Minesweeper():
         return self.mines_found == self.mines
 
 
+class ArrayMinesweeper(Minesweeper):
+    """
+    Minesweeper game representation for large boards, backed by NumPy
+    arrays holding one byte per cell for whether it is a mine and one
+    byte per cell for how many of its neighbors are mines.
+    """
+
+    def __init__(self, height=8, width=8, mines=8, seed=None):
+        import numpy as np
+
+        # Set initial width, height, and number of mines
+        self.height = height
+        self.width = width
+        self.mine_cells = None
+
+        # Sample mine positions without replacement, seeded from `random`
+        # when no seed is given, so games can be reproduced either way
+        if seed is None:
+            seed = random.getrandbits(64)
+        rng = np.random.default_rng(seed)
+        positions = rng.choice(height * width, size=mines, replace=False)
+        self.board = np.zeros((height, width), dtype=bool)
+        self.board.flat[positions] = True
+        self.count_nearby()
+
+        # At first, player has found no mines
+        self.mines_found = set()
+
+    @classmethod
+    def from_layout(cls, height, width, mines):
+        """
+        Creates a game with mines at exactly the given cells.
+        """
+        game = cls(height=height, width=width, mines=0)
+        for i, j in mines:
+            game.board[i, j] = True
+        game.count_nearby()
+        return game
+
+    def count_nearby(self):
+        """
+        Counts the mines near every cell once, with a 3x3 convolution of
+        the board.
+        """
+        import numpy as np
+        height, width = self.height, self.width
+        padded = np.pad(self.board.astype(np.int8), 1)
+        self.counts = np.zeros((height, width), dtype=np.int8)
+        for di in range(3):
+            for dj in range(3):
+                if (di, dj) != (1, 1):
+                    self.counts += padded[di:di + height, dj:dj + width]
+        self.mine_cells = None
+
+    @property
+    def mines(self):
+        """
+        Set of cells that are mines, built the first time it is needed.
+        """
+        if self.mine_cells is None:
+            self.mine_cells = set(
+                (int(i), int(j)) for i, j in zip(*self.board.nonzero())
+            )
+        return self.mine_cells
+
+    def is_mine(self, cell):
+        i, j = cell
+        return bool(self.board[i, j])
+
+    def nearby_mines(self, cell):
+        """
+        Returns the number of mines that are
+        within one row and column of a given cell,
+        not including the cell itself.
+        """
+        i, j = cell
+        return int(self.counts[i, j])
+
+
 class Sentence():
     """
     Logical statement about a Minesweeper game
     A sentence consists of a set of board cells,
     and a count of the number of those cells which are mines.
+
+    The cells are a frozenset, replaced rather than changed when a cell
+    is marked, so the sentence can be hashed to find duplicates and
+    frozenset's cached hash is reused until the cells change.
     """
 
     def __init__(self, cells, count):
-        self.cells = set(cells)
+        self.cells = frozenset(cells)
         self.count = count
 
     def __eq__(self, other):
         return self.cells == other.cells and self.count == other.count
 
+    def __hash__(self):
+        return hash((self.cells, self.count))
+
     def __str__(self):
-        return f"{self.cells} = {self.count}"
+        return f"{set(self.cells)} = {self.count}"
 
     def known_mines(self):
         """
@@ -128,7 +261,7 @@ class Sentence():
         """
         if cell in self.cells:
             # When removing cells, also adjust the count
-            self.cells.remove(cell)
+            self.cells = self.cells.difference((cell,))
             self.count = self.count - 1
 
     def mark_safe(self, cell):
@@ -137,7 +270,7 @@ class Sentence():
         a cell is known to be safe.
         """
         if cell in self.cells:
-            self.cells.remove(cell)
+            self.cells = self.cells.difference((cell,))
 
 
 class MinesweeperAI():
@@ -145,12 +278,24 @@ class MinesweeperAI():
     Minesweeper game player
     """
 
-    def __init__(self, height=8, width=8):
+    def __init__(self, height=8, width=8, mines=None, exact=False,
+                 seed=None):
 
         # Set initial height and width
         self.height = height
         self.width = width
 
+        # Total number of mines on the board, if known
+        self.total_mines = mines
+
+        # Source of random moves, seeded so games can be reproduced
+        self.random = random.Random(seed) if seed is not None else random
+
+        # Whether to solve the frontier exactly after each inference,
+        # caching what each component of the frontier forces
+        self.exact = exact
+        self.component_cache = dict()
+
         # Keep track of which cells have been clicked on
         self.moves_made = set()
 
@@ -158,8 +303,30 @@ class MinesweeperAI():
         self.mines = set()
         self.safes = set()
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Cells not yet clicked on or known to be mines, in a list so a
+        # random one can be picked, with each cell's index in that list
+        self.unknown_cells = [
+            (i, j) for i in range(self.height) for j in range(self.width)
+        ]
+        self.unknown_index = {
+            cell: n for n, cell in enumerate(self.unknown_cells)
+        }
+
+        # Safe cells in the order they were found, until they are played
+        self.safe_moves = deque()
+
+        # Sentences about the game known to be true, keyed by id
+        self.knowledge = dict()
+        self.sentence_ids = itertools.count()
+
+        # Id of each known sentence, so duplicates are found by hash
+        self.sentence_lookup = dict()
+
+        # Ids of the sentences that mention each cell
+        self.cell_index = dict()
+
+        # Ids of sentences that changed since inference last saw them
+        self.changed = set()
 
     def mark_mine(self, cell):
         """
@@ -167,18 +334,81 @@ class MinesweeperAI():
         to mark that cell as a mine as well.
         """
         self.mines.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_mine(cell)
+        self.remove_unknown(cell)
+        # Only sentences mentioning the cell need updating
+        for sentence_id in self.cell_index.pop(cell, ()):
+            self.update_sentence(sentence_id, "mine", cell)
 
     def mark_safe(self, cell):
         """
         Marks a cell as safe, and updates all knowledge
         to mark that cell as safe as well.
         """
+        if cell not in self.safes and cell not in self.moves_made:
+            self.safe_moves.append(cell)
         self.safes.add(cell)
-        for sentence in self.knowledge:
+        # Only sentences mentioning the cell need updating
+        for sentence_id in self.cell_index.pop(cell, ()):
+            self.update_sentence(sentence_id, "safe", cell)
+
+    def remove_unknown(self, cell):
+        """
+        Removes a cell from the unknown cells, by moving the last unknown
+        cell into its place.
+        """
+        n = self.unknown_index.pop(cell, None)
+        if n is None:
+            return
+        last = self.unknown_cells.pop()
+        if last != cell:
+            self.unknown_cells[n] = last
+            self.unknown_index[last] = n
+
+    def update_sentence(self, sentence_id, kind, cell):
+        """
+        Marks `cell` as a mine or safe (given by `kind`) in one sentence,
+        dropping the sentence if it becomes a duplicate of another.
+        """
+        sentence = self.knowledge[sentence_id]
+
+        # Sentences must leave the lookup while their hash changes
+        del self.sentence_lookup[sentence]
+        if kind == "mine":
+            sentence.mark_mine(cell)
+        else:
             sentence.mark_safe(cell)
 
+        if sentence in self.sentence_lookup:
+            self.knowledge.pop(sentence_id)
+            for other in sentence.cells:
+                self.cell_index[other].discard(sentence_id)
+        else:
+            self.sentence_lookup[sentence] = sentence_id
+            self.changed.add(sentence_id)
+
+    def add_sentence(self, sentence):
+        """
+        Adds a sentence to the knowledge base and index, unless it has
+        no cells or is already known.
+        """
+        if not sentence.cells or sentence in self.sentence_lookup:
+            return
+        sentence_id = next(self.sentence_ids)
+        self.knowledge[sentence_id] = sentence
+        self.sentence_lookup[sentence] = sentence_id
+        for cell in sentence.cells:
+            self.cell_index.setdefault(cell, set()).add(sentence_id)
+        self.changed.add(sentence_id)
+
+    def remove_sentence(self, sentence_id):
+        """
+        Removes a sentence from the knowledge base and index.
+        """
+        sentence = self.knowledge.pop(sentence_id)
+        del self.sentence_lookup[sentence]
+        for cell in sentence.cells:
+            self.cell_index[cell].discard(sentence_id)
+
     def add_knowledge(self, cell, count):
         """
         Called when the Minesweeper board tells us, for a given
@@ -194,10 +424,20 @@ class MinesweeperAI():
             5) add any new sentences to the AI's knowledge base
                if they can be inferred from existing knowledge
         """
-        # Mark cell as a move made
-        self.moves_made.add(cell)
-        # Mark cell as safe
-        self.mark_safe(cell)
+        self.add_knowledge_batch([(cell, count)])
+
+    def add_knowledge_batch(self, observations):
+        """
+        Adds what the board told us about many revealed cells at once,
+        given as (cell, count) pairs, and runs inference once afterwards
+        rather than once per cell.
+        """
+        for cell, _ in observations:
+            # Mark cell as a move made
+            self.moves_made.add(cell)
+            self.remove_unknown(cell)
+            # Mark cell as safe
+            self.mark_safe(cell)
 
         # Generates all undetermined neighbors
         def generate_neighbors(cell):
@@ -209,60 +449,74 @@ class MinesweeperAI():
                     i = cell[0] + row
                     j = cell[1] + col
                     if 0 <= i <= self.height - 1 and 0 <= j <= self.width - 1:
+                        # Skip safes
+                        if (i, j) in self.safes:
+                            continue
+                        # Skip mines, passing a number to adjust the count
+                        if (i, j) in self.mines:
+                            num_mines_removed = num_mines_removed + 1
+                            continue
                         neighbors.add((i, j))
-            # Removes safes
-            for unit in self.safes:
-                if unit in neighbors:
-                    neighbors.remove(unit)
-            # Remove mines
-            for unit in self.mines:
-                if unit in neighbors:
-                    neighbors.remove(unit)
-                    # When removing mines, pass a number to adjust the count
-                    num_mines_removed = num_mines_removed + 1
             return (neighbors, num_mines_removed)
 
-        # Create new sentence based off of undetermined neighbors
-        (my_neighbors, count_reduction) = generate_neighbors(cell)
-        sentence = Sentence(cells=my_neighbors, count=count - count_reduction)
-        self.knowledge.append(sentence)
-
-        # Create boolean to indicate when something changed (repeat loop)
-        something_changed = True
-        while something_changed:
-            something_changed = False
-
-            # Update set of known safe cells
-            for sent in self.knowledge:
-                known = sent.known_safes()
-                if known != set():
-                    for cell in known:
-                        self.mark_safe(cell)
-
-            # Update set of known mines
-            for sent in self.knowledge:
-                known = sent.known_mines()
-                if known != set():
-                    for cell in known:
-                        self.mark_mine(cell)
-
-            # Always filter out empty sets
-            filt = filter(lambda s: s.cells != set(), self.knowledge)
-            self.knowledge = list(filt)
-
-            # Iterate through all combinations of sentences from KB
-            combos = list(itertools.permutations(self.knowledge, 2))
-            for (sent1, sent2) in combos:
+        # Create new sentences based off of undetermined neighbors
+        for cell, count in observations:
+            (my_neighbors, count_reduction) = generate_neighbors(cell)
+            sentence = Sentence(
+                cells=my_neighbors,
+                count=count - count_reduction
+            )
+            self.add_sentence(sentence)
+
+        self.infer()
+        if self.exact:
+            self.solve_frontier()
+
+    def infer(self):
+        """
+        Revisits changed sentences until nothing changes, marking cells
+        known to be safe or mines and adding sentences inferred from
+        one sentence being a subset of another.
+        """
+        while self.changed:
+            sentence_id = self.changed.pop()
+            if sentence_id not in self.knowledge:
+                continue
+            sent = self.knowledge[sentence_id]
+
+            # Always filter out empty sentences
+            if not sent.cells:
+                self.remove_sentence(sentence_id)
+                continue
+
+            # Marking known cells empties the sentence and queues it again
+            known_safes = sent.known_safes()
+            known_mines = sent.known_mines()
+            if known_safes or known_mines:
+                for cell in known_safes:
+                    self.mark_safe(cell)
+                for cell in known_mines:
+                    self.mark_mine(cell)
+                continue
+
+            # Only sentences sharing a cell can be subsets of each other
+            related = set()
+            for cell in sent.cells:
+                related.update(self.cell_index[cell])
+            related.discard(sentence_id)
+            for other_id in related:
+                other = self.knowledge[other_id]
                 # When true subset, make new inference
-                if sent1.cells.issubset(sent2.cells) and sent1 != sent2:
-                    new_cells = sent2.cells - sent1.cells
-                    new_count = sent2.count - sent1.count
-                    inf = Sentence(cells=new_cells, count=new_count)
-                    # Make sure knowledge being added is new
-                    if inf not in self.knowledge or inf.cells == set():
-                        self.knowledge.append(inf)
-                        # Indicate change, try new resolves
-                        something_changed = True
+                if sent.cells == other.cells:
+                    continue
+                if sent.cells < other.cells:
+                    self.add_sentence(Sentence(
+                        other.cells - sent.cells, other.count - sent.count
+                    ))
+                elif other.cells < sent.cells:
+                    self.add_sentence(Sentence(
+                        sent.cells - other.cells, sent.count - other.count
+                    ))
 
     def make_safe_move(self):
         """
@@ -273,17 +527,12 @@ class MinesweeperAI():
         This function may use the knowledge in self.mines, self.safes
         and self.moves_made, but should not modify any of those values.
         """
-        keep_trying = True
-        # Try to find a safe move
-        while keep_trying:
-            if len(self.safes) == 0:
-                keep_trying = False
-                return None
-            # Ensure the move hasn't already been made
-            move = self.safes.pop()
-            if move not in self.moves_made:
-                keep_trying = False
-                return move
+        # Drop safe cells that have been played since they were found
+        while self.safe_moves and self.safe_moves[0] in self.moves_made:
+            self.safe_moves.popleft()
+        if not self.safe_moves:
+            return None
+        return self.safe_moves[0]
 
     def make_random_move(self):
         """
@@ -292,15 +541,326 @@ class MinesweeperAI():
             1) have not already been chosen, and
             2) are not known to be mines
         """
-        available_cells = set()
-        # Create set of all possible cells not already made
-        for i in range(self.height):
-            for j in range(self.width):
-                if (i, j) not in self.moves_made and (i, j) not in self.mines:
-                    available_cells.add((i, j))
-        if len(available_cells) == 0:
+        if len(self.unknown_cells) == 0:
             return None
         else:
             # Pick random move
-            move = random.sample(available_cells, 1)
-            return move[0]
+            return self.random.choice(self.unknown_cells)
+
+    def make_probable_move(self, time_limit=0.5):
+        """
+        Returns the move on the Minesweeper board least likely to be a mine,
+        among cells that have not already been chosen and are not known
+        to be mines.
+
+        Falls back to a random move if the mine probabilities cannot be
+        worked out within `time_limit` seconds.
+        """
+        deadline = time.monotonic() + time_limit
+        try:
+            probabilities = self.mine_probabilities(deadline)
+        except TimeoutError:
+            return self.make_random_move()
+        if not probabilities:
+            return None
+
+        # Pick randomly among the safest cells, which are listed in an
+        # order fixed by the game so far, so seeded games replay the same
+        lowest = min(probabilities.values())
+        return self.random.choice([
+            cell for cell, probability in probabilities.items()
+            if probability == lowest
+        ])
+
+    def mine_probabilities(self, deadline=None):
+        """
+        Returns the probability that each cell not yet chosen, and not
+        known to be a mine, is a mine.
+
+        Cells mentioned by the knowledge base are split into components
+        that share no sentences, and each component's consistent mine
+        placements are counted separately. If the total number of mines
+        is known, placements are weighted by the number of ways to place
+        the remaining mines among the cells no sentence mentions.
+        """
+        components = self.frontier_components()
+        distributions = [
+            self.count_placements(cells, sentences, deadline)
+            for cells, sentences in components
+        ]
+        frontier = set()
+        for cells, _ in components:
+            frontier.update(cells)
+        unconstrained = [
+            cell for cell in self.unknown_cells
+            if cell not in frontier and cell not in self.safes
+        ]
+
+        # Safe cells waiting to be played hold no mines
+        probabilities = {
+            cell: 0.0 for cell in self.unknown_cells if cell in self.safes
+        }
+
+        # Without a mine count, weigh each component's placements equally
+        if self.total_mines is None:
+            for (cells, _), distribution in zip(components, distributions):
+                total = sum(ways for ways, _ in distribution.values())
+                for n, cell in enumerate(cells):
+                    mines = sum(
+                        per_cell[n] for _, per_cell in distribution.values()
+                    )
+                    probabilities[cell] = mines / total
+            average = (sum(probabilities.values()) / len(frontier)
+                       if frontier else 0.5)
+            for cell in unconstrained:
+                probabilities[cell] = average
+            return probabilities
+
+        remaining = self.total_mines - len(self.mines)
+        others = len(unconstrained)
+
+        def check():
+            """Raises TimeoutError once `deadline` has passed."""
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError
+
+        # Scale each component's counts so the largest is 1, keeping
+        # every product below float overflow; a component's probabilities
+        # only depend on the ratios of its counts
+        scaled = []
+        for distribution in distributions:
+            largest = max(
+                (ways for ways, _ in distribution.values()), default=1
+            )
+            scaled.append({
+                mines: (ways / largest, [n / largest for n in per_cell])
+                for mines, (ways, per_cell) in distribution.items()
+            })
+        distributions = scaled
+
+        def combine(distributions):
+            """
+            Returns the weight of placements across several components
+            by their total number of mines.
+            """
+            combined = {0: 1.0}
+            for distribution in distributions:
+                merged = dict()
+                for mines, ways in combined.items():
+                    check()
+                    for more, (more_ways, _) in distribution.items():
+                        merged[mines + more] = (
+                            merged.get(mines + more, 0) + ways * more_ways
+                        )
+                combined = merged
+            return combined
+
+        # Ways to place the remaining mines among the unconstrained cells,
+        # for each number of mines on the frontier, relative to the most
+        # ways; exact binomials would be huge integers on large boards
+        most = sum(
+            max(distribution, default=0) for distribution in distributions
+        )
+        logs = dict()
+        for mines in range(most + 1):
+            k = remaining - mines
+            if 0 <= k <= others:
+                logs[mines] = (math.lgamma(others + 1) - math.lgamma(k + 1)
+                               - math.lgamma(others - k + 1))
+        peak = max(logs.values(), default=0)
+        weights = {mines: math.exp(log - peak) for mines, log in logs.items()}
+
+        def spread(mines):
+            """Relative ways to place `mines` among unconstrained cells."""
+            return weights.get(mines, 0)
+
+        combined = combine(distributions)
+        total = sum(ways * spread(mines) for mines, ways in combined.items())
+        if total == 0:
+            probabilities.update(
+                dict.fromkeys(list(frontier) + unconstrained, 0.5)
+            )
+            return probabilities
+
+        # Each component's cells, given every other component's placements
+        for n, (cells, _) in enumerate(components):
+            rest = combine(distributions[:n] + distributions[n + 1:])
+            mine_ways = [0] * len(cells)
+            for mines, (_, per_cell) in distributions[n].items():
+                check()
+                weight = sum(
+                    ways * spread(mines + more) for more, ways in rest.items()
+                )
+                for k in range(len(cells)):
+                    mine_ways[k] += per_cell[k] * weight
+            for k, cell in enumerate(cells):
+                probabilities[cell] = mine_ways[k] / total
+
+        # Unconstrained cells share the mines left over from the frontier
+        if others:
+            expected = sum(
+                ways * spread(mines) * (remaining - mines)
+                for mines, ways in combined.items()
+            )
+            check()
+            probabilities.update(
+                dict.fromkeys(unconstrained, expected / (total * others))
+            )
+        return probabilities
+
+    def solve_frontier(self, time_limit=0.1):
+        """
+        Finds every cell that is a mine, or is safe, in all placements
+        of mines consistent with the knowledge base, considering each
+        component of the frontier as a whole rather than pairs of
+        sentences, and marks those cells until nothing more follows.
+
+        Components whose placements take longer than `time_limit` seconds
+        to count are skipped.
+        """
+        while True:
+            cache = dict()
+            safes = set()
+            mines = set()
+            for cells, sentences in self.frontier_components():
+
+                # Unchanged components force what they forced last time
+                key = frozenset((s.cells, s.count) for s in sentences)
+                if key in self.component_cache:
+                    cache[key] = self.component_cache[key]
+                    continue
+
+                forced_safes = set()
+                forced_mines = set()
+                try:
+                    distribution = self.count_placements(
+                        cells, sentences, time.monotonic() + time_limit
+                    )
+                except TimeoutError:
+                    distribution = dict()
+                if distribution:
+                    total = sum(ways for ways, _ in distribution.values())
+                    for n, cell in enumerate(cells):
+                        mine_ways = sum(
+                            counts[n] for _, counts in distribution.values()
+                        )
+                        if mine_ways == 0:
+                            forced_safes.add(cell)
+                        elif mine_ways == total:
+                            forced_mines.add(cell)
+                cache[key] = (forced_safes, forced_mines)
+                safes.update(forced_safes)
+                mines.update(forced_mines)
+
+            # Only components still in the knowledge base stay cached
+            self.component_cache = cache
+            if not safes and not mines:
+                return
+            for cell in safes:
+                self.mark_safe(cell)
+            for cell in mines:
+                self.mark_mine(cell)
+            self.infer()
+
+    def frontier_components(self):
+        """
+        Splits the knowledge base into groups of sentences where no two
+        groups share a cell. Returns a list of (cells, sentences) pairs,
+        with each group's cells in sorted order.
+        """
+        components = []
+        seen = set()
+        for start in self.knowledge:
+            if start in seen:
+                continue
+            seen.add(start)
+            stack = [start]
+            cells = set()
+            sentences = []
+            while stack:
+                sentence = self.knowledge[stack.pop()]
+                sentences.append(sentence)
+                for cell in sentence.cells:
+                    if cell in cells:
+                        continue
+                    cells.add(cell)
+                    for other in self.cell_index[cell]:
+                        if other not in seen:
+                            seen.add(other)
+                            stack.append(other)
+            components.append((sorted(cells), sentences))
+        return components
+
+    def count_placements(self, cells, sentences, deadline=None):
+        """
+        Counts the placements of mines among `cells` consistent with every
+        sentence, going through the cells in order and merging placements
+        that leave each sentence needing the same number of mines.
+
+        Returns a dict mapping each possible number of mines to a pair of
+        the number of placements with that many mines, and a list of how
+        many of those placements put a mine in each cell.
+        Raises TimeoutError if `deadline` passes first.
+        """
+        position = {cell: n for n, cell in enumerate(cells)}
+
+        # For each cell, the sentences mentioning it and how many of
+        # their cells come after it
+        touching = [[] for _ in cells]
+        for k, sentence in enumerate(sentences):
+            members = sorted(position[cell] for cell in sentence.cells)
+            for after, n in enumerate(reversed(members)):
+                touching[n].append((k, after))
+
+        def check():
+            """Raises TimeoutError once `deadline` has passed."""
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError
+
+        # Going forwards, how many mines each sentence still needs before
+        # each cell, and where giving the cell no mine or a mine leads
+        start = tuple(sentence.count for sentence in sentences)
+        layers = []
+        reached = {start}
+        for n in range(len(cells)):
+            check()
+            layer = dict()
+            following = set()
+            for needed in reached:
+                moves = []
+                for value in (0, 1):
+
+                    # Each sentence must still be able to reach its count
+                    still_needed = list(needed)
+                    for k, after in touching[n]:
+                        still_needed[k] -= value
+                        if not 0 <= still_needed[k] <= after:
+                            break
+                    else:
+                        moves.append((value, tuple(still_needed)))
+                        following.add(tuple(still_needed))
+                layer[needed] = moves
+            layers.append(layer)
+            reached = following
+
+        # Going backwards, the placements of the remaining cells from
+        # each of those states
+        results = {needed: {0: (1, [])} for needed in reached}
+        for n in range(len(cells) - 1, -1, -1):
+            current = dict()
+            for needed, moves in layers.pop().items():
+                check()
+                result = dict()
+                for value, still_needed in moves:
+                    rest = results[still_needed]
+                    for mines, (ways, per_cell) in rest.items():
+                        if mines + value not in result:
+                            result[mines + value] = (0, [0] * (len(cells) - n))
+                        total, counts = result[mines + value]
+                        counts[0] += ways * value
+                        for k, count in enumerate(per_cell):
+                            counts[k + 1] += count
+                        result[mines + value] = (total + ways, counts)
+                current[needed] = result
+            results = current
+        return results[start]
@@ -0,0 +1,112 @@
+import argparse
+import cProfile
+import json
+import pstats
+import time
+
+from minesweeper import Minesweeper, MinesweeperAI
+
+
+def encode_game(game, moves, exact=False):
+    """
+    Returns the log record of a game: its size, where its mines are and
+    every move the AI made, with each cell stored as i * width + j.
+    """
+    return {
+        "height": game.height,
+        "width": game.width,
+        "mines": sorted(i * game.width + j for i, j in game.mines),
+        "moves": [i * game.width + j for i, j in moves],
+        "exact": exact
+    }
+
+
+def decode_cells(indices, width):
+    """Returns the cells stored as `indices` on a board `width` wide."""
+    return [divmod(n, width) for n in indices]
+
+
+def write_games(records, f):
+    """Writes game records to an open text file, one JSON line each."""
+    for record in records:
+        f.write(json.dumps(record, separators=(",", ":")))
+        f.write("\n")
+
+
+def read_games(f):
+    """Lazily reads the game records written by write_games()."""
+    for line in f:
+        if line.strip():
+            yield json.loads(line)
+
+
+def replay(record):
+    """
+    Feeds the moves of a recorded game back through a new MinesweeperAI,
+    timing how long it takes to add the knowledge from each move.
+
+    Returns a list with, for each move, the cell moved to, how many cells
+    that move revealed, the size of the knowledge base afterwards and the
+    seconds spent adding its knowledge.
+    """
+    height, width = record["height"], record["width"]
+    mines = decode_cells(record["mines"], width)
+    game = Minesweeper.from_layout(height, width, mines)
+    ai = MinesweeperAI(
+        height=height, width=width, mines=len(mines),
+        exact=record.get("exact", False)
+    )
+
+    timings = []
+    for move in decode_cells(record["moves"], width):
+        if game.is_mine(move):
+            break
+        observations = game.reveal(move, ai.moves_made)
+        start = time.perf_counter()
+        ai.add_knowledge_batch(observations)
+        seconds = time.perf_counter() - start
+        timings.append((move, len(observations), len(ai.knowledge), seconds))
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Replay recorded Minesweeper games through the AI."
+    )
+    parser.add_argument("log", help="file of games recorded by simulate.py")
+    parser.add_argument("--top", type=int, default=10,
+                        help="number of slowest moves to list")
+    parser.add_argument("--profile", action="store_true",
+                        help="profile the replay with cProfile")
+    args = parser.parse_args()
+
+    with open(args.log) as f:
+        records = list(read_games(f))
+
+    profiler = cProfile.Profile() if args.profile else None
+    if profiler:
+        profiler.enable()
+    moves = []
+    for n, record in enumerate(records):
+        for k, timing in enumerate(replay(record)):
+            moves.append((n, k) + timing)
+    if profiler:
+        profiler.disable()
+
+    total = sum(seconds for *_, seconds in moves)
+    print(f"Replayed {len(records)} games, {len(moves)} moves "
+          f"in {total:.3f}s of inference")
+    print(f"Slowest {min(args.top, len(moves))} moves:")
+    print(f"{'game':>6}{'move':>6}{'cell':>14}{'revealed':>10}"
+          f"{'knowledge':>11}{'ms':>10}")
+    slowest = sorted(moves, key=lambda move: move[-1], reverse=True)
+    for game, k, cell, revealed, size, seconds in slowest[:args.top]:
+        print(f"{game:>6}{k:>6}{str(cell):>14}{revealed:>10}"
+              f"{size:>11}{seconds * 1000:>10.3f}")
+
+    if profiler:
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(20)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+import argparse
+import json
+import statistics
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from minesweeper import ArrayMinesweeper, Minesweeper, MinesweeperAI
+from replay import encode_game, write_games
+
+
+def play(height, width, mines, strategy, array, exact, seed):
+    """
+    Plays one seeded game of Minesweeper with the AI, without a display.
+    Returns whether the AI won, the seconds each move took (choosing the
+    move and adding its knowledge), the size of the AI's knowledge base
+    after each move, and a record of the game for replay.py.
+    """
+    board = ArrayMinesweeper if array else Minesweeper
+    game = board(height=height, width=width, mines=mines, seed=seed)
+    ai = MinesweeperAI(
+        height=height, width=width, mines=mines, exact=exact, seed=seed
+    )
+    moves = []
+    move_times = []
+    knowledge_sizes = []
+
+    while True:
+        start = time.perf_counter()
+
+        move = ai.make_safe_move()
+        if move is None:
+            if strategy == "probable":
+                move = ai.make_probable_move()
+            else:
+                move = ai.make_random_move()
+
+        # No moves left means every safe cell has been revealed
+        if move is None:
+            won = True
+            break
+        moves.append(move)
+        if game.is_mine(move):
+            won = False
+            break
+
+        ai.add_knowledge_batch(game.reveal(move, ai.moves_made))
+        move_times.append(time.perf_counter() - start)
+        knowledge_sizes.append(len(ai.knowledge))
+
+        if len(ai.moves_made) == height * width - mines:
+            won = True
+            break
+
+    return won, move_times, knowledge_sizes, encode_game(game, moves, exact)
+
+
+def summarize(values):
+    """Returns the mean, median, 95th and 99th percentiles and maximum."""
+    if not values:
+        return dict()
+    if len(values) == 1:
+        percentiles = values * 99
+    else:
+        percentiles = statistics.quantiles(values, n=100, method="inclusive")
+    return {
+        "mean": statistics.fmean(values),
+        "median": statistics.median(values),
+        "p95": percentiles[94],
+        "p99": percentiles[98],
+        "max": max(values)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Simulate Minesweeper games played by the AI."
+    )
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--height", type=int, default=8)
+    parser.add_argument("--width", type=int, default=8)
+    parser.add_argument("--mines", type=int, default=8)
+    parser.add_argument("--density", type=float,
+                        help="fraction of cells that are mines "
+                             "(overrides --mines)")
+    parser.add_argument("--strategy", choices=["probable", "random"],
+                        default="probable",
+                        help="how to move when no safe move is known")
+    parser.add_argument("--exact", action="store_true",
+                        help="solve the frontier exactly after each move")
+    parser.add_argument("--array", action="store_true",
+                        help="use the NumPy-backed board")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed of the first game")
+    parser.add_argument("--processes", type=int)
+    parser.add_argument("--json", help="file to write the report to")
+    parser.add_argument("--record",
+                        help="file to write every game to, for replay.py")
+    args = parser.parse_args()
+
+    mines = args.mines
+    if args.density is not None:
+        mines = round(args.density * args.height * args.width)
+
+    # Play every game in a pool of processes, one seed per game
+    start = time.perf_counter()
+    game = partial(
+        play, args.height, args.width, mines, args.strategy, args.array,
+        args.exact
+    )
+    seeds = range(args.seed, args.seed + args.games)
+    with ProcessPoolExecutor(max_workers=args.processes) as executor:
+        results = list(executor.map(
+            game, seeds, chunksize=max(1, args.games // 64)
+        ))
+    elapsed = time.perf_counter() - start
+
+    wins = sum(won for won, _, _, _ in results)
+    move_times = [t for _, times, _, _ in results for t in times]
+    knowledge_sizes = [n for _, _, sizes, _ in results for n in sizes]
+    report = {
+        "height": args.height,
+        "width": args.width,
+        "mines": mines,
+        "strategy": args.strategy,
+        "exact": args.exact,
+        "games": args.games,
+        "seed": args.seed,
+        "wins": wins,
+        "win_rate": wins / args.games,
+        "moves": len(move_times),
+        "seconds": elapsed,
+        "move_seconds": summarize(move_times),
+        "knowledge_size": summarize(knowledge_sizes)
+    }
+
+    print(f"Board: {args.height}x{args.width}, {mines} mines, "
+          f"{args.strategy} fallback"
+          f"{', exact frontier' if args.exact else ''}")
+    print(f"Games: {args.games} in {elapsed:.1f}s")
+    print(f"Win rate: {wins}/{args.games} ({100 * wins / args.games:.1f}%)")
+    for name, scale, unit in [("move_seconds", 1000, "ms"),
+                              ("knowledge_size", 1, "sentences")]:
+        stats = ", ".join(
+            f"{key} {value * scale:.3g}"
+            for key, value in report[name].items()
+        )
+        print(f"{name.replace('_', ' ').capitalize()} ({unit}): {stats}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=4)
+
+    if args.record:
+        with open(args.record, "w") as f:
+            write_games((record for _, _, _, record in results), f)
+
+
+if __name__ == "__main__":
+    main()
@@ -43,7 +43,7 @@ mine = pygame.transform.scale(mine, (cell_size, cell_size))
 
 # Create game and AI agent
 game = Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES)
-ai = MinesweeperAI(height=HEIGHT, width=WIDTH)
+ai = MinesweeperAI(height=HEIGHT, width=WIDTH, mines=MINES, exact=True)
 
 # Keep track of revealed cells, flagged cells, and if a mine was hit
 revealed = set()
@@ -189,12 +189,12 @@ while True:
         if aiButton.collidepoint(mouse) and not lost:
             move = ai.make_safe_move()
             if move is None:
-                move = ai.make_random_move()
+                move = ai.make_probable_move()
                 if move is None:
                     flags = ai.mines.copy()
                     print("No moves left to make.")
                 else:
-                    print("No known safe moves, AI making random move.")
+                    print("No known safe moves, AI making best guess.")
             else:
                 print("AI making safe move.")
             time.sleep(0.2)
@@ -202,7 +202,9 @@ while True:
         # Reset game state
         elif resetButton.collidepoint(mouse):
             game = Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES)
-            ai = MinesweeperAI(height=HEIGHT, width=WIDTH)
+            ai = MinesweeperAI(
+                height=HEIGHT, width=WIDTH, mines=MINES, exact=True
+            )
             revealed = set()
             flags = set()
             safes = set()
@@ -223,9 +225,11 @@ while True:
         if game.is_mine(move):
             lost = True
         else:
-            nearby = game.nearby_mines(move)
-            revealed.add(move)
-            ai.add_knowledge(move, nearby)
+            # Reveal the whole region of cells with no nearby mines
+            observations = game.reveal(move, revealed)
+            for cell, _ in observations:
+                revealed.add(cell)
+            ai.add_knowledge_batch(observations)
             flages = ai.mines.copy()
             safes = ai.safes.copy()
 
@@ -0,0 +1,250 @@
+import argparse
+import json
+import os
+import random
+import tempfile
+
+from crossword import *
+from generate import CrosswordCreator
+
+
+# Grid sizes generated for each structure family, and their fraction of
+# blocked cells
+SIZES = {
+    "open": [4, 5, 6, 7],
+    "random": [5, 7, 9, 11],
+    "american": [5, 7, 9, 11]
+}
+DENSITIES = {
+    "open": 0.3,
+    "random": 0.4,
+    "american": 0.2
+}
+
+# Numbers of words sampled from the vocabulary for each run
+VOCABULARY_SIZES = [500, 1000, 3000]
+
+# Shortest entry allowed in an American-style grid
+MIN_LENGTH = 3
+
+
+def open_grid(size, density, rng):
+    """
+    Generates a `size` by `size` grid with blocks only where an odd row
+    meets an odd column, leaving a lattice of long crossing words, with
+    up to `density` of the cells blocked.
+    Returns the grid as a list of rows, with True for open cells.
+    """
+    grid = [[True] * size for _ in range(size)]
+    cells = [(i, j) for i in range(1, size, 2) for j in range(1, size, 2)]
+    count = min(round(density * size * size), len(cells))
+    for (i, j) in rng.sample(cells, count):
+        grid[i][j] = False
+    return grid
+
+
+def random_grid(size, density, rng):
+    """
+    Generates a `size` by `size` grid with blocked cells scattered
+    uniformly at random, so that `density` of the cells are blocked.
+    Returns the grid as a list of rows, with True for open cells.
+    """
+    cells = [(i, j) for i in range(size) for j in range(size)]
+    blocked = set(rng.sample(cells, round(density * len(cells))))
+    return [[(i, j) not in blocked for j in range(size)] for i in range(size)]
+
+
+def american_grid(size, density, rng):
+    """
+    Generates a `size` by `size` American-style grid: symmetric under
+    180-degree rotation, with every open cell in both an across and a
+    down entry of at least MIN_LENGTH letters, and all open cells
+    connected. Blocks are added in symmetric pairs until `density` of the
+    cells are blocked or no more can be added.
+    Returns the grid as a list of rows, with True for open cells.
+    """
+    grid = [[True] * size for _ in range(size)]
+    cells = [(i, j) for i in range(size) for j in range(size)]
+    rng.shuffle(cells)
+    blocked = 0
+    for (i, j) in cells:
+        if blocked >= density * size * size:
+            break
+        pair = {(i, j), (size - 1 - i, size - 1 - j)}
+        if not all(grid[k][l] for k, l in pair):
+            continue
+        for k, l in pair:
+            grid[k][l] = False
+        if american(grid):
+            blocked += len(pair)
+        else:
+            for k, l in pair:
+                grid[k][l] = True
+    return grid
+
+
+def american(grid):
+    """
+    Checks that every run of open cells in `grid`, across or down, is at
+    least MIN_LENGTH long, and that the open cells are connected.
+    """
+    size = len(grid)
+    lines = grid + [list(column) for column in zip(*grid)]
+    for line in lines:
+        run = 0
+        for cell in line + [False]:
+            if cell:
+                run += 1
+            else:
+                if 0 < run < MIN_LENGTH:
+                    return False
+                run = 0
+
+    # Every open cell must be reachable from the first one
+    open_cells = {
+        (i, j) for i in range(size) for j in range(size) if grid[i][j]
+    }
+    if not open_cells:
+        return False
+    frontier = [next(iter(open_cells))]
+    reached = set(frontier)
+    while frontier:
+        i, j = frontier.pop()
+        for cell in [(i - 1, j), (i + 1, j), (i, j - 1), (i, j + 1)]:
+            if cell in open_cells and cell not in reached:
+                reached.add(cell)
+                frontier.append(cell)
+    return reached == open_cells
+
+
+FAMILIES = {
+    "open": open_grid,
+    "random": random_grid,
+    "american": american_grid
+}
+
+
+def solve_backtrack(creator):
+    return creator.solve()
+
+
+def solve_mac(creator):
+    return creator.solve_mac()
+
+
+def solve_restarts(creator):
+    return creator.solve_restarts()
+
+
+# Every single-process solver configuration
+SOLVERS = {
+    "backtrack": solve_backtrack,
+    "mac": solve_mac,
+    "restarts": solve_restarts
+}
+
+
+def write_structure(grid, path):
+    """Writes a grid in the format of the files in data/."""
+    with open(path, "w") as f:
+        for row in grid:
+            f.write("".join("_" if cell else "#" for cell in row) + "\n")
+
+
+def measure(solver, crossword, seed, time_limit):
+    """
+    Runs a solver on a crossword with the given seed and time limit.
+    Returns how the run ended ("solved", "unsolvable" or "timeout") and
+    the creator's search statistics.
+    """
+    creator = CrosswordCreator(crossword, seed=seed)
+    creator.time_limit = time_limit
+    assignment = solver(creator)
+    if creator.exceeded:
+        result = "timeout"
+    elif assignment is None:
+        result = "unsolvable"
+    else:
+        result = "solved"
+    return result, creator.statistics()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the crossword solvers in generate.py."
+    )
+    parser.add_argument("--families", nargs="+", choices=FAMILIES,
+                        default=list(FAMILIES))
+    parser.add_argument("--solvers", nargs="+", choices=SOLVERS,
+                        default=list(SOLVERS))
+    parser.add_argument("--vocabulary", default="data/words2.txt",
+                        help="words file to sample vocabularies from")
+    parser.add_argument("--sizes", nargs="+", type=int,
+                        default=VOCABULARY_SIZES,
+                        help="numbers of words to sample")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--time-limit", type=float, default=5,
+                        help="seconds each solver may search for")
+    parser.add_argument("--output", help="file to write JSON lines to")
+    args = parser.parse_args()
+
+    with open(args.vocabulary) as f:
+        vocabulary = sorted(set(f.read().upper().splitlines()))
+
+    output = open(args.output, "w") if args.output else None
+    print(f"{'family':<10}{'size':>6}{'words':>7}{'solver':>11}"
+          f"{'result':>12}{'seconds':>10}{'nodes':>9}{'backtracks':>12}")
+
+    with tempfile.TemporaryDirectory() as directory:
+
+        # Sample each vocabulary once, so every structure uses the same
+        vocabularies = dict()
+        for count in args.sizes:
+            rng = random.Random(f"{args.seed}-{count}")
+            sample = rng.sample(vocabulary, min(count, len(vocabulary)))
+            vocabularies[count] = os.path.join(directory, f"words{count}.txt")
+            with open(vocabularies[count], "w") as f:
+                f.write("\n".join(sample) + "\n")
+
+        structure = os.path.join(directory, "structure.txt")
+        for family in args.families:
+            for size in SIZES[family]:
+
+                # Every solver sees the same generated problem
+                rng = random.Random(f"{args.seed}-{family}-{size}")
+                grid = FAMILIES[family](size, DENSITIES[family], rng)
+                write_structure(grid, structure)
+
+                for count in args.sizes:
+                    crossword = Crossword(structure, vocabularies[count])
+                    words = min(count, len(vocabulary))
+
+                    for name in args.solvers:
+                        result, statistics = measure(
+                            SOLVERS[name], crossword, args.seed,
+                            args.time_limit
+                        )
+                        seconds = sum(statistics["seconds"].values())
+                        print(f"{family:<10}{size:>6}{words:>7}"
+                              f"{name:>11}{result:>12}{seconds:>10.4f}"
+                              f"{statistics['nodes']:>9}"
+                              f"{statistics['backtracks']:>12}", flush=True)
+                        if output:
+                            output.write(json.dumps({
+                                "family": family,
+                                "size": size,
+                                "density": DENSITIES[family],
+                                "words": words,
+                                "seed": args.seed,
+                                "solver": name,
+                                "variables": len(crossword.variables),
+                                "result": result,
+                                **statistics
+                            }) + "\n")
+
+    if output:
+        output.close()
+
+
+if __name__ == "__main__":
+    main()
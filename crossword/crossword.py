@@ -1,3 +1,8 @@
+import mmap
+import os
+import struct
+
+
 class Variable():
 
     ACROSS = "across"
@@ -27,6 +32,12 @@ class Variable():
             (self.length == other.length)
         )
 
+    def __lt__(self, other):
+        return (
+            (self.i, self.j, self.direction, self.length) <
+            (other.i, other.j, other.direction, other.length)
+        )
+
     def __str__(self):
         return f"({self.i}, {self.j}) {self.direction} : {self.length}"
 
@@ -57,10 +68,6 @@ class Crossword():
                         row.append(False)
                 self.structure.append(row)
 
-        # Save vocabulary list
-        with open(words_file) as f:
-            self.words = set(f.read().upper().splitlines())
-
         # Determine variable set
         self.variables = set()
         for i in range(self.height):
@@ -125,9 +132,239 @@ class Crossword():
                         cells2.index(intersection)
                     )
 
+        # For each variable, every overlapping variable and their overlap,
+        # found through the variables covering each cell; variables are
+        # sorted so neighbors are listed in an order that does not depend
+        # on string hashing
+        ordered = sorted(self.variables)
+        covering = dict()
+        for var in ordered:
+            for cell in var.cells:
+                covering.setdefault(cell, []).append(var)
+        self.adjacency = {var: dict() for var in ordered}
+        for var in ordered:
+            for cell in var.cells:
+                for other in covering[cell]:
+                    if other != var:
+                        self.adjacency[var][other] = self.overlaps[var, other]
+
+        # Save vocabulary, keeping only words of the lengths of variables
+        self.index = WordIndex.load(
+            words_file, {var.length for var in self.variables}
+        )
+
+    @property
+    def words(self):
+        """Set of vocabulary words of the lengths of any variable."""
+        return {
+            word for words in self.index.words.values() for word in words
+        }
+
     def neighbors(self, var):
         """Given a variable, return set of overlapping variables."""
-        return set(
-            v for v in self.variables
-            if v != var and self.overlaps[v, var]
+        return set(self.adjacency[var])
+
+
+class WordIndex():
+
+    def __init__(self, words):
+        """
+        Index a vocabulary by word length, and by the letter each word has
+        at each position.
+
+        Words of each length are numbered, so any set of words of one
+        length can be stored as an integer with bit n set for word n.
+        """
+
+        # Words of each length, in order of their number
+        self.words = dict()
+        for word in sorted(words):
+            self.words.setdefault(len(word), []).append(word)
+
+        # Number of each word among the words of its length
+        self.ids = {
+            length: {word: n for n, word in enumerate(words)}
+            for length, words in self.words.items()
+        }
+
+        # For each (length, position), each letter's set of words with that
+        # letter at that position; bits are set in bytearrays first, since
+        # building large integers one bit at a time is quadratic
+        self.letters = dict()
+        for length, words in self.words.items():
+            size = (len(words) + 7) // 8
+            bits = dict()
+            for n, word in enumerate(words):
+                for position, letter in enumerate(word):
+                    key = (position, letter)
+                    if key not in bits:
+                        bits[key] = bytearray(size)
+                    bits[key][n >> 3] |= 1 << (n & 7)
+            for (position, letter), array in bits.items():
+                self.letters.setdefault((length, position), dict())[letter] = (
+                    int.from_bytes(array, "little")
+                )
+
+    # Compiled indexes start with a header, then a table of contents with
+    # where the words of each length start in the file
+    MAGIC = b"CWIX"
+    VERSION = 1
+    HEADER = struct.Struct("<4sHqqI")
+    CONTENTS = struct.Struct("<IIQ")
+    SECTION = struct.Struct("<QI")
+    ENTRY = struct.Struct("<HI")
+
+    @classmethod
+    def load(cls, words_file, lengths=None):
+        """
+        Return the index of the vocabulary in `words_file`, keeping only
+        words of the given `lengths` if any are given.
+
+        The compiled index is cached in a __pycache__ directory next to
+        the words file, and rebuilt whenever the words file's size or
+        modification time changes. Cached indexes are memory-mapped, so
+        only the lengths being kept are read.
+        """
+        stat = os.stat(words_file)
+        directory, name = os.path.split(words_file)
+        cache = os.path.join(directory, "__pycache__", name + ".index")
+        try:
+            return cls.read(cache, stat, lengths)
+        except (OSError, ValueError, struct.error):
+            pass
+
+        with open(words_file) as f:
+            index = cls(set(f.read().upper().splitlines()))
+        try:
+            index.write(cache, stat)
+        except OSError:
+            pass
+        if lengths is not None:
+            for length in set(index.words) - set(lengths):
+                del index.words[length]
+                del index.ids[length]
+            index.letters = {
+                key: letters for key, letters in index.letters.items()
+                if key[0] in index.words
+            }
+        return index
+
+    @classmethod
+    def read(cls, path, stat, lengths=None):
+        """
+        Return the index compiled to `path`, keeping only words of the
+        given `lengths` if any are given. Raise ValueError if it was not
+        compiled from a words file with the given `stat`.
+        """
+        with open(path, "rb") as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            magic, version, mtime, size, count = cls.HEADER.unpack_from(data)
+            if (magic, version) != (cls.MAGIC, cls.VERSION):
+                raise ValueError(f"{path} is not a compiled word index")
+            if (mtime, size) != (stat.st_mtime_ns, stat.st_size):
+                raise ValueError(f"{path} is out of date")
+
+            index = cls.__new__(cls)
+            index.words = dict()
+            index.letters = dict()
+            offset = cls.HEADER.size
+            for _ in range(count):
+                length, number, start = cls.CONTENTS.unpack_from(data, offset)
+                offset += cls.CONTENTS.size
+                if lengths is not None and length not in lengths:
+                    continue
+
+                # Words are stored one per line, then each letter's words
+                size, entries = cls.SECTION.unpack_from(data, start)
+                start += cls.SECTION.size
+                text = data[start:start + size].decode()
+                index.words[length] = text.split("\n")[:number]
+                start += size
+                width = (number + 7) // 8
+                for _ in range(entries):
+                    position, letter = cls.ENTRY.unpack_from(data, start)
+                    start += cls.ENTRY.size
+                    index.letters.setdefault((length, position), dict())[
+                        chr(letter)
+                    ] = int.from_bytes(data[start:start + width], "little")
+                    start += width
+
+        index.ids = {
+            length: {word: n for n, word in enumerate(words)}
+            for length, words in index.words.items()
+        }
+        return index
+
+    def write(self, path, stat):
+        """
+        Compile the index to `path`, recording the `stat` of the words
+        file it was built from.
+        """
+        sections = []
+        for length, words in self.words.items():
+            text = "\n".join(words).encode()
+            width = (len(words) + 7) // 8
+            entries = [
+                (position, letter, words_mask)
+                for position in range(length)
+                for letter, words_mask in self.letters.get(
+                    (length, position), dict()
+                ).items()
+            ]
+            section = [self.SECTION.pack(len(text), len(entries)), text]
+            for position, letter, words_mask in entries:
+                section.append(self.ENTRY.pack(position, ord(letter)))
+                section.append(words_mask.to_bytes(width, "little"))
+            sections.append((length, len(words), b"".join(section)))
+
+        header = self.HEADER.pack(
+            self.MAGIC, self.VERSION, stat.st_mtime_ns, stat.st_size,
+            len(sections)
         )
+        start = len(header) + self.CONTENTS.size * len(sections)
+        contents = []
+        for length, number, section in sections:
+            contents.append(self.CONTENTS.pack(length, number, start))
+            start += len(section)
+
+        # Write to a temporary file first, so readers never see half a file
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f"{path}.{os.getpid()}"
+        with open(temporary, "wb") as f:
+            f.write(header)
+            f.write(b"".join(contents))
+            for _, _, section in sections:
+                f.write(section)
+        os.replace(temporary, path)
+
+    def full(self, length):
+        """Return the set of every word of the given length."""
+        return (1 << len(self.words.get(length, ()))) - 1
+
+    def mask(self, words):
+        """Return the set of the given words, all of one length."""
+        mask = 0
+        for word in words:
+            mask |= 1 << self.ids[len(word)][word]
+        return mask
+
+    def decode(self, length, mask):
+        """Return the list of words of the given length in a set."""
+        words = self.words.get(length, [])
+        bits = bin(mask)[:1:-1]
+        return [words[n] for n, bit in enumerate(bits) if bit == "1"]
+
+    def compatible(self, length, index, other_length, other_index, other):
+        """
+        Return the set of words of `length` whose letter at `index` is the
+        letter at `other_index` of some word in the set `other` of words
+        of `other_length`.
+        """
+        letters = self.letters.get((length, index), dict())
+        mask = 0
+        for letter, words in self.letters.get(
+            (other_length, other_index), dict()
+        ).items():
+            if words & other and letter in letters:
+                mask |= letters[letter]
+        return mask
@@ -1,22 +1,81 @@
-import sys
+import argparse
+import itertools
+import multiprocessing
+import os
 import random
-import copy
+import time
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
 
 from crossword import *
 
 
 class CrosswordCreator():
 
-    def __init__(self, crossword):
+    def __init__(self, crossword, seed=None):
         """
-        Create new CSP crossword generate.
+        Create new CSP crossword generate. Ties between variables are
+        broken randomly, reproducibly if a `seed` is given.
         """
         self.crossword = crossword
+        self.index = crossword.index
+        self.random = random.Random(seed) if seed is not None else random
+
+        # Variables in a fixed order, so that ties are broken the same way
+        # for a given seed whatever order the set of variables is in
+        self.variables = sorted(self.crossword.variables)
+
+        # Each domain is a bitset over the words of the variable's length
         self.domains = {
-            var: self.crossword.words.copy()
-            for var in self.crossword.variables
+            var: self.index.full(var.length)
+            for var in self.variables
         }
 
+        # Domains as they were before each revision, most recent last,
+        # so backtracking can undo just the revisions it needs to
+        self.trail = []
+
+        # Words used by the assignment currently being searched
+        self.used_words = set()
+
+        # Search statistics, to compare solvers, with seconds per phase
+        self.nodes = 0
+        self.backtracks = 0
+        self.backjumps = 0
+        self.restarts = 0
+        self.revisions = 0
+        self.wipeouts = 0
+        self.times = dict()
+
+        # Search gives up by raising TimeoutError once this creator has
+        # expanded node_limit nodes or searched for time_limit seconds,
+        # setting `exceeded` to "nodes" or "time" and returning the largest
+        # partial assignment it found; it also raises TimeoutError at a
+        # restart's node cutoff, or soon after the `stop` event is set
+        self.node_limit = None
+        self.time_limit = None
+        self.cutoff = None
+        self.stop = None
+        self.exceeded = None
+        self.best = dict()
+
+        # Seconds between progress reports while searching, if any
+        self.progress = None
+
+    def domain_words(self, var):
+        """
+        Return the list of words in the domain of `var`.
+        """
+        return self.index.decode(var.length, self.domains[var])
+
+    def domain_size(self, var):
+        """
+        Return the number of words in the domain of `var`.
+        """
+        return self.domains[var].bit_count()
+
     def letter_grid(self, assignment):
         """
         Return 2D array representing a given assignment.
@@ -90,10 +149,103 @@ class CrosswordCreator():
     def solve(self):
         """
         Enforce node and arc consistency, and then solve the CSP.
+
+        If search runs out of nodes or time, return the largest partial
+        assignment it found instead.
         """
-        self.enforce_node_consistency()
-        self.ac3()
-        return self.backtrack(dict())
+        self.begin()
+        with self.phase("node consistency"):
+            self.enforce_node_consistency()
+        with self.phase("arc consistency"):
+            self.ac3()
+        # revisions made before search never need undoing
+        self.trail.clear()
+        try:
+            with self.phase("search"):
+                return self.backtrack(dict())
+        except TimeoutError:
+            return self.best
+
+    def begin(self):
+        """
+        Start timing a new search against the time limit.
+        """
+        self.started = time.perf_counter()
+        self.next_report = self.started + (self.progress or 0)
+        self.exceeded = None
+        self.best = dict()
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Add the time spent in a `with` block to the time of phase `name`.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.times[name] = self.times.get(name, 0) + elapsed
+
+    def count_node(self, assignment=None):
+        """
+        Count a node expanded by search, which has just extended
+        `assignment` if it keeps one, and report progress when it is due.
+
+        Raise TimeoutError if search has used up its nodes, time or
+        cutoff, or has been told to stop.
+        """
+        self.nodes += 1
+        if assignment is not None and len(assignment) > len(self.best):
+            self.best = dict(assignment)
+        if self.node_limit is not None and self.nodes > self.node_limit:
+            self.exceeded = "nodes"
+            raise TimeoutError
+        if self.cutoff is not None and self.nodes > self.cutoff:
+            raise TimeoutError
+
+        # check the clock and the stop flag only now and then
+        if self.nodes % 64:
+            return
+        if self.stop is not None and self.stop.is_set():
+            raise TimeoutError
+        now = time.perf_counter()
+        if self.progress and now >= self.next_report:
+            self.next_report = now + self.progress
+            report = f"{now - self.started:.1f}s: {self.nodes} nodes"
+            if assignment is not None:
+                report += (
+                    f", {self.backtracks} backtracks, "
+                    f"{len(assignment)}/{len(self.crossword.variables)} "
+                    f"assigned, best {len(self.best)}"
+                )
+            print(report, flush=True)
+        if (self.time_limit is not None
+                and now - self.started > self.time_limit):
+            self.exceeded = "time"
+            raise TimeoutError
+
+    def statistics(self):
+        """
+        Return a dict of the search statistics gathered so far.
+        """
+        return {
+            "nodes": self.nodes,
+            "backtracks": self.backtracks,
+            "backjumps": self.backjumps,
+            "restarts": self.restarts,
+            "revisions": self.revisions,
+            "wipeouts": self.wipeouts,
+            "seconds": dict(self.times)
+        }
+
+    def undo(self, mark):
+        """
+        Restore every domain revised since the trail was `mark` long.
+        """
+        while len(self.trail) > mark:
+            var, domain = self.trail.pop()
+            self.domains[var] = domain
 
     def enforce_node_consistency(self):
         """
@@ -101,16 +253,10 @@ class CrosswordCreator():
         (Remove any values that are inconsistent with a variable's unary
          constraints; in this case, the length of the word.)
         """
-        # create a copy to apply changes to
-        domains_copy = copy.deepcopy(self.domains)
         # loop through all variables in domains dict
         for var in self.domains.keys():
-            # loop through all words in that dict key's values
-            for word in self.domains[var]:
-                # if word doesn't match the variable's length, remove
-                if var.length != len(word):
-                    domains_copy[var].remove(word)
-        self.domains = domains_copy
+            # keep only words of the variable's length
+            self.domains[var] &= self.index.full(var.length)
 
     def revise(self, x, y):
         """
@@ -121,29 +267,23 @@ class CrosswordCreator():
         Return True if a revision was made to the domain of `x`; return
         False if no revision was made.
         """
-        # create indicator for revisions made
-        revision = False
         # check that they have an overlap
         overlap = self.crossword.overlaps[x, y]
-        if overlap is not None:
-            # get indices of each variable's character that overlaps
-            (index_x, index_y) = overlap
-            # make a copy of x_domains to apply changes
-            x_domains_copy = copy.deepcopy(self.domains[x])
-            # loop through every possible value of x
-            for word_x in self.domains[x]:
-                word_available = False
-                # loop through every possible value of y
-                for word_y in self.domains[y]:
-                    # if y has a viable option, indicate it
-                    if word_x[index_x] == word_y[index_y]:
-                        word_available = True
-                # if no words in y are viable, remove from x's domain
-                if not word_available:
-                    x_domains_copy.remove(word_x)
-                    revision = True
-            self.domains[x] = x_domains_copy
-        return revision
+        if overlap is None:
+            return False
+        # get indices of each variable's character that overlaps
+        (index_x, index_y) = overlap
+        # words of x whose letter matches the letter of some word in y
+        supported = self.index.compatible(
+            x.length, index_x, y.length, index_y, self.domains[y]
+        )
+        revised = self.domains[x] & supported
+        if revised == self.domains[x]:
+            return False
+        self.trail.append((x, self.domains[x]))
+        self.domains[x] = revised
+        self.revisions += 1
+        return True
 
     def ac3(self, arcs=None):
         """
@@ -154,29 +294,37 @@ class CrosswordCreator():
         Return True if arc consistency is enforced and no domains are empty;
         return False if one or more domains end up empty.
         """
-        # if arcs is None, add all possible arcs
+        adjacency = self.crossword.adjacency
+        # if arcs is None, add every arc between overlapping variables
         if arcs is None:
-            queue = []
-            for v1 in self.crossword.variables:
-                for v2 in self.crossword.variables:
-                    if v1 != v2:
-                        queue.append((v1, v2))
-        # otherwise, use arcs as initial queue
-        else:
-            queue = arcs
+            arcs = [
+                (x, y)
+                for x in self.variables for y in adjacency[x]
+            ]
+        # use arcs as initial queue, keeping track of arcs already in it
+        queue = deque()
+        queued = set()
+        for arc in arcs:
+            if arc not in queued:
+                queue.append(arc)
+                queued.add(arc)
         # loop until the queue is empty
-        while queue != []:
+        while queue:
             # make one arc consistent at a time
-            (x, y) = queue.pop(0)
+            arc = queue.popleft()
+            queued.remove(arc)
+            (x, y) = arc
             if self.revise(x, y):
                 # if a variable's domain is reduced to 0, no solution
-                if len(self.domains[x]) == 0:
+                if not self.domains[x]:
+                    self.wipeouts += 1
                     return False
                 # is a revision was made, add all neighbors but y to queue
                 else:
-                    for neighbor in self.crossword.neighbors(x):
-                        if neighbor != y:
+                    for neighbor in adjacency[x]:
+                        if neighbor != y and (neighbor, x) not in queued:
                             queue.append((neighbor, x))
+                            queued.add((neighbor, x))
         # everything is arc consistent
         return True
 
@@ -203,13 +351,8 @@ class CrosswordCreator():
         assigned_words = assignment.values()
 
         # check that all values are distinct
-        for var1 in assigned_words:
-            count = 0
-            for var2 in assigned_words:
-                if var1 == var2:
-                    count += 1
-            if count != 1:
-                return False
+        if len(set(assigned_words)) != len(assigned_words):
+            return False
 
         assigned_variables = assignment.keys()
         # check the every value is correct length
@@ -237,6 +380,21 @@ class CrosswordCreator():
         # passed all three constraints
         return True
 
+    def consistent_with(self, var, word, assignment):
+        """
+        Return True if assigning `word` to `var` keeps an already consistent
+        `assignment` consistent, checking only the word's length, whether
+        the word is already used and the neighbors of `var`.
+        """
+        if var.length != len(word) or word in self.used_words:
+            return False
+        for neighbor, overlap in self.crossword.adjacency[var].items():
+            if neighbor in assignment:
+                (index_var, index_neighbor) = overlap
+                if word[index_var] != assignment[neighbor][index_neighbor]:
+                    return False
+        return True
+
     def order_domain_values(self, var, assignment):
         """
         Return a list of values in the domain of `var`, in order by
@@ -254,11 +412,13 @@ class CrosswordCreator():
                 unassigned_neighbors.append(neighbor)
 
         # loop through every word in var's domain
-        for word in self.domains[var]:
+        ids = self.index.ids.get(var.length, dict())
+        for word in self.domain_words(var):
             lcv = 0
             # count every neighbor whose word would get ruled out
             for neighbor in unassigned_neighbors:
-                if word in self.domains[neighbor]:
+                if (neighbor.length == var.length
+                        and self.domains[neighbor] >> ids[word] & 1):
                     lcv += 1
             # add that lcv value paired with the key as the word
             lcv_values[word] = lcv
@@ -276,19 +436,20 @@ class CrosswordCreator():
         return values.
         """
         # find available, unassigned variables
-        diff = self.crossword.variables.difference(assignment.keys())
-        available_variables = diff
+        available_variables = [
+            var for var in self.variables if var not in assignment
+        ]
         # set min_length tracker to an initial value
-        first_var = available_variables.pop()
-        min_length = len(self.domains[first_var])
+        first_var = available_variables.pop(0)
+        min_length = self.domain_size(first_var)
         min_var = [first_var]
         # loop through all available variables
         for var in available_variables:
             # if a tie, append
-            if len(self.domains[var]) == min_length:
+            if self.domain_size(var) == min_length:
                 min_var.append(var)
             # if new minimum, reset list to single variable
-            elif len(self.domains[var]) < min_length:
+            elif self.domain_size(var) < min_length:
                 min_var = [var]
         # if there is a variable with minimum remaining values, return it
         if len(min_var) == 1:
@@ -312,7 +473,7 @@ class CrosswordCreator():
                 return most_neighbors[0]
             # there is a tie in variables with highest degree, return random
             else:
-                return random.choice(most_neighbors)
+                return self.random.choice(most_neighbors)
 
     def backtrack(self, assignment):
         """
@@ -323,29 +484,33 @@ class CrosswordCreator():
 
         If no assignment is possible, return None.
         """
+        # used words must match the assignment search starts from
+        if len(self.used_words) != len(assignment):
+            self.used_words = set(assignment.values())
         # if the assignment is complete and consistent, return it
         if self.assignment_complete(assignment):
             if self.consistent(assignment):
                 return assignment
+            return None
         # select an unassigned variable (based on heuristics)
         var = self.select_unassigned_variable(assignment)
         # loop through every word in ascending order (based on heuristic)
         for word in self.order_domain_values(var, assignment):
 
-            # add assignment to COPY
-            new_assignment = copy.deepcopy(assignment)
-            new_assignment[var] = word
+            # ensure the word is not already used and fits its neighbors
+            if self.consistent_with(var, word, assignment):
 
-            # ensure the word is not already used
-            if self.consistent(new_assignment):
+                # add assignment
+                assignment[var] = word
+                self.used_words.add(word)
+                self.count_node(assignment)
 
                 # allow for rewind of ac3's affects
-                domain = copy.deepcopy(self.domains)
+                mark = len(self.trail)
 
                 # creates inferences
-                neighbors = self.crossword.neighbors(var)
                 arcs = []
-                for neighbor in neighbors:
+                for neighbor in self.crossword.adjacency[var]:
                     arcs.append((neighbor, var))
                 inferences = self.ac3(arcs)
 
@@ -353,41 +518,610 @@ class CrosswordCreator():
                 if inferences:
 
                     # recursively call backtrack to see if we find solution
-                    result = self.backtrack(new_assignment)
+                    result = self.backtrack(assignment)
 
                     # if result is not a failure, return it
                     if result is not None:
                         return result
 
                 # removes inferences from assignment
-                self.domains = domain
+                self.undo(mark)
 
-            # if it doesn't yield a solution, backtrack by removing assignment
-            new_assignment.popitem()
+                # if it doesn't yield a solution, backtrack by removing it
+                del assignment[var]
+                self.used_words.remove(word)
+                self.backtracks += 1
 
         # if we run out of variables and words to try, return None
         return None
 
+    def solve_mac(self):
+        """
+        Enforce node and arc consistency, and then solve the CSP by
+        maintaining arc consistency after every assignment, backjumping
+        on failure to the most recent variable in conflict, and choosing
+        variables by domain size over weighted degree.
+
+        If search runs out of nodes or time, return the largest partial
+        assignment it found instead.
+        """
+        self.begin()
+        if not self.prepare_mac():
+            return None
+        try:
+            with self.phase("search"):
+                assignment, _ = self.mac_search(dict())
+            return assignment
+        except TimeoutError:
+            return self.best
 
-def main():
+    def solve_restarts(self, unit=100):
+        """
+        Solve the CSP like solve_mac(), but restart search from scratch
+        whenever a run expands more nodes than its cutoff. The i-th run's
+        cutoff is `unit` times the i-th term of the Luby sequence, and the
+        constraint weights learned by earlier runs are kept.
+
+        Return None if there is no solution, the largest partial assignment
+        found if search runs out of nodes or time, or raise TimeoutError if
+        the `stop` event is set first.
+        """
+        self.begin()
+        if not self.prepare_mac():
+            return None
+        for run in itertools.count(1):
+            self.cutoff = self.nodes + unit * luby(run)
+            try:
+                with self.phase("search"):
+                    assignment, _ = self.mac_search(dict())
+                return assignment
+            except TimeoutError:
+                if self.exceeded:
+                    return self.best
+                if self.stop is not None and self.stop.is_set():
+                    raise
+            finally:
+                self.cutoff = None
+            self.restarts += 1
+            self.restart()
+
+    def prepare_mac(self):
+        """
+        Enforce node and arc consistency and set up the state used by
+        mac_search(). Return False if some domain is left empty.
+        """
+        variables = self.variables
+        adjacency = self.crossword.adjacency
+
+        # Constraints that wiped out a domain weigh more when choosing
+        self.weights = {
+            frozenset((x, y)): 1 for x in variables for y in adjacency[x]
+        }
+
+        # Assigned variables explaining why each domain was revised, with
+        # the explanations as they were before each change, most recent last
+        self.reasons = {var: frozenset() for var in variables}
+        self.reason_trail = []
+
+        with self.phase("node consistency"):
+            self.enforce_node_consistency()
+        with self.phase("arc consistency"):
+            if not self.ac3():
+                return False
+        self.initial_domains = dict(self.domains)
+        self.restart()
+        return True
+
+    def restart(self):
+        """
+        Return every domain to how prepare_mac() left it, forgetting the
+        assignment being searched but not the constraint weights.
+        """
+        self.domains = dict(self.initial_domains)
+        self.trail.clear()
+        self.reasons = {var: frozenset() for var in self.variables}
+        self.reason_trail.clear()
+        self.used_words = set()
+        self.word_owners = dict()
+
+    def select_dom_wdeg(self, assignment):
+        """
+        Return the unassigned variable with the smallest ratio of domain
+        size to the total weight of its constraints with other unassigned
+        variables.
+        """
+        def ratio(var):
+            weight = sum(
+                self.weights[frozenset((var, neighbor))]
+                for neighbor in self.crossword.adjacency[var]
+                if neighbor not in assignment
+            )
+            return self.domain_size(var) / max(weight, 1)
+
+        # break ties randomly
+        return min(
+            (var for var in self.variables if var not in assignment),
+            key=lambda var: (ratio(var), self.random.random())
+        )
+
+    def conflicts(self, var, word, assignment):
+        """
+        Return the set of assigned variables that conflict with assigning
+        `word` to `var`: the variable already using the word, and any
+        neighbors with a different letter where they overlap.
+        """
+        culprits = set()
+        if word in self.used_words:
+            culprits.add(self.word_owners[word])
+        for neighbor, overlap in self.crossword.adjacency[var].items():
+            if neighbor in assignment:
+                (index_var, index_neighbor) = overlap
+                if word[index_var] != assignment[neighbor][index_neighbor]:
+                    culprits.add(neighbor)
+        return culprits
+
+    def propagate(self, var, assignment):
+        """
+        Make unassigned variables arc consistent after assigning `var`,
+        recording which assigned variables explain each revision.
+
+        Return the variable whose domain was wiped out, or None if every
+        domain is still non-empty.
+        """
+        adjacency = self.crossword.adjacency
+        queue = deque(
+            (neighbor, var) for neighbor in adjacency[var]
+            if neighbor not in assignment
+        )
+        queued = set(queue)
+        while queue:
+            arc = queue.popleft()
+            queued.remove(arc)
+            (x, y) = arc
+            if not self.revise(x, y):
+                continue
+
+            # x lost words because of y's value, or of whatever revised y
+            reason = {y} if y in assignment else self.reasons[y]
+            self.reason_trail.append((x, self.reasons[x]))
+            self.reasons[x] = self.reasons[x] | reason
 
-    # Check usage
-    if len(sys.argv) not in [3, 4]:
-        sys.exit("Usage: python generate.py structure words [output]")
+            if not self.domains[x]:
+                self.weights[frozenset((x, y))] += 1
+                self.wipeouts += 1
+                return x
+            for neighbor in adjacency[x]:
+                arc = (neighbor, x)
+                if (neighbor != y and neighbor not in assignment
+                        and arc not in queued):
+                    queue.append(arc)
+                    queued.add(arc)
+        return None
+
+    def undo_reasons(self, mark):
+        """
+        Restore every explanation changed since the reason trail was `mark`
+        long.
+        """
+        while len(self.reason_trail) > mark:
+            var, reasons = self.reason_trail.pop()
+            self.reasons[var] = reasons
+
+    def mac_search(self, assignment):
+        """
+        Extend `assignment` to a complete assignment with conflict-directed
+        backjumping.
+
+        Return a pair of the complete assignment (or None if there is
+        none) and, on failure, the set of assigned variables whose values
+        caused it, so that search can jump straight back to the most
+        recent of them.
+        """
+        if len(assignment) == len(self.crossword.variables):
+            return assignment, set()
+        var = self.select_dom_wdeg(assignment)
+
+        # Words missing from the domain were removed by these variables
+        conflict = set(self.reasons[var])
+
+        for word in self.order_domain_values(var, assignment):
+            culprits = self.conflicts(var, word, assignment)
+            if culprits:
+                conflict |= culprits
+                continue
+
+            # add assignment, narrowing var's domain to the word
+            mark = len(self.trail)
+            reason_mark = len(self.reason_trail)
+            assignment[var] = word
+            self.used_words.add(word)
+            self.word_owners[word] = var
+            self.count_node(assignment)
+            self.trail.append((var, self.domains[var]))
+            self.domains[var] = 1 << self.index.ids[var.length][word]
+
+            wiped = self.propagate(var, assignment)
+            if wiped is None:
+                result, failure = self.mac_search(assignment)
+                if result is not None:
+                    return result, set()
+                backjump = var not in failure
+                conflict |= failure - {var}
+            else:
+                backjump = False
+                conflict |= self.reasons[wiped] - {var}
+
+            # remove the assignment and everything inferred from it
+            self.undo(mark)
+            self.undo_reasons(reason_mark)
+            del assignment[var]
+            self.used_words.remove(word)
+            del self.word_owners[word]
+            self.backtracks += 1
+
+            # var's value played no part, so trying others cannot help
+            if backjump:
+                self.backjumps += 1
+                return None, failure
+
+        return None, conflict
+
+    def solutions(self, shuffle=False):
+        """
+        Enforce node and arc consistency, and then lazily yield every
+        solution to the CSP, each as a new assignment. If `shuffle` is
+        True, words are tried in random order, so that the first few
+        solutions are a more varied sample.
+
+        Search state is shared with the creator's other solvers, so finish
+        or discard the generator before solving again. If search runs out
+        of nodes or time, the generator raises TimeoutError.
+        """
+        self.begin()
+        with self.phase("node consistency"):
+            self.enforce_node_consistency()
+        with self.phase("arc consistency"):
+            if not self.ac3():
+                return
+        self.trail.clear()
+        self.used_words = set()
+        yield from self.extend_all(dict(), shuffle)
+
+    def extend_all(self, assignment, shuffle=False):
+        """
+        Yield every complete assignment extending `assignment`, keeping
+        every domain arc consistent along the way.
+        """
+        if len(assignment) == len(self.crossword.variables):
+            yield dict(assignment)
+            return
+        var = min(
+            (var for var in self.variables if var not in assignment),
+            key=self.domain_size
+        )
+        words = self.domain_words(var)
+        if shuffle:
+            self.random.shuffle(words)
+
+        for word in words:
+            if not self.consistent_with(var, word, assignment):
+                continue
+
+            # add assignment, narrowing var's domain to the word
+            mark = len(self.trail)
+            assignment[var] = word
+            self.used_words.add(word)
+            self.count_node(assignment)
+            self.trail.append((var, self.domains[var]))
+            self.domains[var] = 1 << self.index.ids[var.length][word]
+
+            arcs = [
+                (neighbor, var) for neighbor in self.crossword.adjacency[var]
+                if neighbor not in assignment
+            ]
+            if self.ac3(arcs):
+                yield from self.extend_all(assignment, shuffle)
+
+            # remove the assignment and everything inferred from it
+            self.undo(mark)
+            del assignment[var]
+            self.used_words.remove(word)
+
+    def count_solutions(self):
+        """
+        Enforce node and arc consistency, and then return the number of
+        solutions to the CSP, without enumerating all of them.
+
+        Once assigned variables split the unassigned ones into independent
+        groups whose domains share no words, the count is the product of
+        the groups' counts, and each group's count is remembered by its
+        variables and their domains.
+
+        Return None if search runs out of nodes or time first.
+        """
+        self.begin()
+        with self.phase("node consistency"):
+            self.enforce_node_consistency()
+        with self.phase("arc consistency"):
+            if not self.ac3():
+                return 0
+        self.trail.clear()
+        self.counts = dict()
+        try:
+            with self.phase("search"):
+                return self.count(frozenset(self.crossword.variables))
+        except TimeoutError:
+            return None
+
+    def components(self, variables):
+        """
+        Return the groups of `variables` connected by overlaps between
+        variables in the group.
+        """
+        adjacency = self.crossword.adjacency
+        unvisited = set(variables)
+        groups = []
+        for start in sorted(variables):
+            if start not in unvisited:
+                continue
+            unvisited.remove(start)
+            group = {start}
+            frontier = [start]
+            while frontier:
+                var = frontier.pop()
+                for neighbor in adjacency[var]:
+                    if neighbor in unvisited:
+                        unvisited.remove(neighbor)
+                        group.add(neighbor)
+                        frontier.append(neighbor)
+            groups.append(frozenset(group))
+        return groups
+
+    def disjoint(self, groups):
+        """
+        Return True if no word is in the domains of two different groups
+        of variables, so that the groups can never use the same word.
+        """
+        seen = dict()
+        for group in groups:
+            words = dict()
+            for var in group:
+                domain = self.domains[var]
+                words[var.length] = words.get(var.length, 0) | domain
+            for length, mask in words.items():
+                if seen.get(length, 0) & mask:
+                    return False
+                seen[length] = seen.get(length, 0) | mask
+        return True
+
+    def count(self, variables):
+        """
+        Return the number of ways to give each of `variables` a different
+        word from its domain such that overlapping variables agree, given
+        that their domains already exclude words used by assigned
+        variables and are arc consistent with them.
+        """
+        if not variables:
+            return 1
+        key = frozenset((var, self.domains[var]) for var in variables)
+        if key in self.counts:
+            return self.counts[key]
+
+        # independent groups can be counted separately
+        groups = self.components(variables)
+        if len(groups) > 1 and self.disjoint(groups):
+            total = 1
+            for group in groups:
+                total *= self.count(group)
+                if not total:
+                    break
+            self.counts[key] = total
+            return total
+
+        var = min(
+            variables, key=lambda var: (self.domain_size(var), var)
+        )
+        rest = variables - {var}
+        total = 0
+        for word in self.domain_words(var):
+            self.count_node()
+            mark = len(self.trail)
+            self.trail.append((var, self.domains[var]))
+            bit = 1 << self.index.ids[var.length][word]
+            self.domains[var] = bit
+
+            # no other variable may use the word
+            for other in rest:
+                if other.length == var.length and self.domains[other] & bit:
+                    self.trail.append((other, self.domains[other]))
+                    self.domains[other] &= ~bit
+
+            arcs = [
+                (neighbor, var) for neighbor in self.crossword.adjacency[var]
+                if neighbor in rest
+            ]
+            if all(self.domains[other] for other in rest) and self.ac3(arcs):
+                total += self.count(rest)
+            self.undo(mark)
+
+        self.counts[key] = total
+        return total
+
+
+def luby(i):
+    """
+    Return the i-th term, counting from 1, of the Luby sequence
+    1, 1, 2, 1, 1, 2, 4, 1, 1, 2, 1, 1, 2, 4, 8, ...
+    """
+    k = i.bit_length()
+    if i == (1 << k) - 1:
+        return 1 << (k - 1)
+    return luby(i - (1 << (k - 1)) + 1)
+
+
+# Restart cutoff units the solvers in a portfolio take turns using
+PORTFOLIO_UNITS = [100, 400, 25]
+
+
+def portfolio(crossword, solvers=None, seed=0, processes=None,
+              time_limit=None, node_limit=None):
+    """
+    Solve a crossword by racing `solvers` (by default, one per CPU)
+    restarting solvers across a pool of processes, each with its own seed
+    and restart cutoff unit, and each limited to `time_limit` seconds and
+    `node_limit` nodes. As soon as any solver finds a solution or proves
+    there is none, the others are stopped.
+
+    Return a tuple of the solution (or None if there is none), what ran
+    out if every solver ran out of nodes or time, and the statistics of
+    the solver the answer came from. If every solver ran out, the answer
+    is the largest partial assignment any of them found.
+    """
+    solvers = solvers or os.cpu_count()
+
+    # Workers receive the crossword once, when the pool starts
+    stop = multiprocessing.Event()
+    with ProcessPoolExecutor(
+        max_workers=processes or solvers,
+        initializer=_init_worker,
+        initargs=(crossword, stop, time_limit, node_limit)
+    ) as executor:
+        futures = [
+            executor.submit(
+                _solve_seeded, seed + k,
+                PORTFOLIO_UNITS[k % len(PORTFOLIO_UNITS)]
+            )
+            for k in range(solvers)
+        ]
+        best = (None, None, None)
+        for future in as_completed(futures):
+            assignment, exceeded, statistics = future.result()
+
+            # The first solver to finish has the answer, so stop the rest
+            if not exceeded:
+                stop.set()
+                for other in futures:
+                    other.cancel()
+                return assignment, None, statistics
+            if assignment is not None and (
+                best[0] is None or len(assignment) > len(best[0])
+            ):
+                best = (assignment, exceeded, statistics)
+    return best
+
+
+# Crossword, stop flag and limits shared by every portfolio worker
+_worker_state = None
+
+
+def _init_worker(crossword, stop, time_limit, node_limit):
+    """Stores the crossword a worker process will solve."""
+    global _worker_state
+    _worker_state = (crossword, stop, time_limit, node_limit)
+
+
+def _solve_seeded(seed, unit):
+    """
+    Solves the worker's crossword with restarts, seeded with `seed`.
+    Returns the solution (or best partial assignment), what ran out if
+    the solver ran out of nodes or time or was stopped, and the
+    solver's statistics.
+    """
+    crossword, stop, time_limit, node_limit = _worker_state
+    creator = CrosswordCreator(crossword, seed=seed)
+    creator.stop = stop
+    creator.time_limit = time_limit
+    creator.node_limit = node_limit
+    try:
+        assignment = creator.solve_restarts(unit)
+    except TimeoutError:
+        return None, "stopped", creator.statistics()
+    return assignment, creator.exceeded, creator.statistics()
+
+
+def print_statistics(statistics):
+    """Print search statistics as returned by statistics()."""
+    print(", ".join(
+        f"{name}: {value}" for name, value in statistics.items()
+        if name != "seconds"
+    ).capitalize())
+    print("Seconds: " + ", ".join(
+        f"{phase} {seconds:.4f}"
+        for phase, seconds in statistics["seconds"].items()
+    ))
+
+
+def main():
 
     # Parse command-line arguments
-    structure = sys.argv[1]
-    words = sys.argv[2]
-    output = sys.argv[3] if len(sys.argv) == 4 else None
+    parser = argparse.ArgumentParser(description="Generate a crossword.")
+    parser.add_argument("structure", help="file with the crossword's shape")
+    parser.add_argument("words", help="file of words to fill it with")
+    parser.add_argument("output", nargs="?",
+                        help="image file to save the crossword to")
+    parser.add_argument("--mac", action="store_true",
+                        help="maintain arc consistency and backjump")
+    parser.add_argument("--portfolio", type=int, metavar="N",
+                        help="race N restarting solvers in parallel")
+    parser.add_argument("--seed", type=int,
+                        help="seed for breaking ties between variables")
+    parser.add_argument("--count", action="store_true",
+                        help="count the solutions instead of showing one")
+    parser.add_argument("--stats", action="store_true",
+                        help="print search statistics")
+    parser.add_argument("--progress", type=float, metavar="SECONDS",
+                        help="report search progress every SECONDS")
+    parser.add_argument("--time-limit", type=float, metavar="SECONDS",
+                        help="stop searching after SECONDS")
+    parser.add_argument("--node-limit", type=int, metavar="N",
+                        help="stop searching after N nodes")
+    args = parser.parse_args()
+    if args.portfolio and args.progress:
+        parser.error("--progress cannot be used with --portfolio")
+    if args.portfolio and args.count:
+        parser.error("--count cannot be used with --portfolio")
+    structure = args.structure
+    words = args.words
+    output = args.output
 
     # Generate crossword
     crossword = Crossword(structure, words)
-    creator = CrosswordCreator(crossword)
-    assignment = creator.solve()
+    creator = CrosswordCreator(crossword, seed=args.seed)
+    creator.progress = args.progress
+    creator.time_limit = args.time_limit
+    creator.node_limit = args.node_limit
+    if args.count:
+        count = creator.count_solutions()
+        if count is None:
+            print(f"Out of {creator.exceeded} before counting every "
+                  f"solution.")
+        else:
+            print(f"Solutions: {count}")
+        if args.stats:
+            print_statistics(creator.statistics())
+        return
+    if args.portfolio:
+        assignment, exceeded, statistics = portfolio(
+            crossword, args.portfolio, args.seed or 0,
+            time_limit=args.time_limit, node_limit=args.node_limit
+        )
+    else:
+        if args.mac:
+            assignment = creator.solve_mac()
+        else:
+            assignment = creator.solve()
+        exceeded = creator.exceeded
+        statistics = creator.statistics()
+    if args.stats and statistics:
+        print_statistics(statistics)
 
     # Print result
     if assignment is None:
         print("No solution.")
+    elif exceeded:
+        print(f"Out of {exceeded}, filled {len(assignment)} of "
+              f"{len(crossword.variables)} words:")
+        creator.print(assignment)
     else:
         creator.print(assignment)
         if output: